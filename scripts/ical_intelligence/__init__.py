@@ -0,0 +1,7 @@
+"""
+iCal Token Intelligence
+
+Package behind scripts/ical-intelligence.py. Modules are imported on demand
+(the bridge loads calendar parsing, metadata and calibration only when a
+command needs them), so nothing is re-exported here.
+"""
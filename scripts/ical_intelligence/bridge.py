@@ -0,0 +1,845 @@
+"""
+Calendar-to-token-budget bridge
+
+Calendar parsing, metadata extraction and calibration are imported on first
+use, so commands that only need usage data never load them.
+"""
+
+import os
+import json
+import time
+from datetime import datetime, timedelta
+from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple, Sequence
+
+from .output import log
+from .profiling import StageProfiler
+from .snapshot import usage_signature, write_status_snapshot
+from .usage import UsageAggregator, get_week_start
+from .window import TokenWindow, format_minute, minute_of
+
+if TYPE_CHECKING:
+    from .calibration import TokenCalibration
+    from .ics import OccurrenceCache
+    from .index import CalendarIndex
+
+class iCalTokenBridge:
+    """
+    Minimal bridge between iCal and token tracking
+    Phase 1: Manual event parsing and prediction
+    """
+
+    def __init__(self):
+        self.tracker_path = Path.home() / '.claude' / 'token-tracker.json'
+        self.calendar_index_path = self.tracker_path.parent / 'ical-index.db'
+        self.projects_path = self.tracker_path.parent / 'projects'
+        self.usage_checkpoint_path = self.tracker_path.parent / 'ical-usage-checkpoint.json'
+        self.calibration_path = self.tracker_path.parent / 'ical-calibration.json'
+        self.quota_path = self.tracker_path.parent / 'quota-tracker.json'
+        self.status_snapshot_path = self.tracker_path.parent / 'ical-status.snapshot'
+        self.usage = None
+        self._calendar_index = None
+        self.workers = None  # Ingestion processes; None picks one per CPU for large backlogs
+        self.profiler = StageProfiler()  # Disabled unless the CLI got --profile
+
+        # Complexity-based token rates (from your planning docs)
+        self.token_rates = {
+            'low': 5000,      # Simple tasks, bug fixes
+            'medium': 10000,  # Standard development
+            'high': 15000,    # Complex features
+            'critical': 20000 # Architecture, major features
+        }
+
+        # Per-token pricing (from planning docs)
+        self.pricing = {
+            'opus': {
+                'input': 0.000015,
+                'output': 0.000075
+            },
+            'sonnet': {
+                'input': 0.000003,
+                'output': 0.000015
+            },
+            'haiku': {
+                'input': 0.0000005,
+                'output': 0.0000025
+            }
+        }
+
+    @cached_property
+    def calibration(self) -> Optional['TokenCalibration']:
+        """The model written by calibrate(), loaded on first use (None until one is fitted)"""
+        from .calibration import TokenCalibration
+        return TokenCalibration.load(self.calibration_path)
+
+    @cached_property
+    def calendar_path(self) -> Optional[Path]:
+        """Calendar folder, located on first use"""
+        return self.find_calendar_location()
+
+    @cached_property
+    def occurrences(self) -> 'OccurrenceCache':
+        """Expanded recurring series, kept for the life of the bridge"""
+        from .ics import OccurrenceCache
+        return OccurrenceCache()
+
+    def find_calendar_location(self) -> Optional[Path]:
+        """
+        Locate calendar data
+
+        ICAL_CALENDAR_PATH overrides detection (any directory of .ics files);
+        otherwise macOS iCal data at ~/Library/Calendars/ is used.
+        """
+        override = os.environ.get('ICAL_CALENDAR_PATH')
+        candidates = [Path(override).expanduser()] if override else [
+            Path.home() / 'Library' / 'Calendars'
+        ]
+        for candidate in candidates:
+            if candidate.is_dir():
+                return candidate
+        return None
+
+    @property
+    def calendar_index(self) -> 'CalendarIndex':
+        """
+        The interval index, refreshed on first use
+
+        Refreshing only stats the .ics files and re-parses those that changed
+        since the previous run.
+        """
+        if self._calendar_index is None:
+            from .index import CalendarIndex
+            self._calendar_index = CalendarIndex(self.calendar_index_path)
+            with self.profiler.stage('calendar.index'):
+                self._calendar_index.refresh(self.calendar_path, self.workers)
+        return self._calendar_index
+
+    def refresh_calendar(self):
+        """Re-scan the calendar folder, e.g. after `serve` saw it change"""
+        if self._calendar_index is None:
+            return
+        with self.profiler.stage('calendar.index'):
+            self._calendar_index.refresh(self.calendar_path, self.workers)
+        self.occurrences.clear()
+
+    def get_calendar_sessions(self, start: datetime, end: datetime, overlapping: bool = False) -> List[Dict]:
+        """
+        Return coding sessions starting in [start, end), sorted by start time
+
+        With overlapping=True, every session intersecting [start, end) is
+        returned instead. Lookups go through the interval index; recurring
+        series are expanded only inside the window, with moved or edited
+        instances (RECURRENCE-ID) replacing the occurrence they override.
+        """
+        if self.calendar_path is None:
+            return []
+        from .ics import event_to_session
+        index = self.calendar_index
+
+        with self.profiler.stage('calendar.query'):
+            sessions = []
+            for event in index.events_between(start, end, overlapping):
+                session = event_to_session(event)
+                if session is not None:
+                    sessions.append(session)
+
+            sessions.extend(self.get_series_sessions(start, end, overlapping))
+            return sorted(sessions, key=lambda session: session['start'])
+
+    def get_series_sessions(self, start: datetime, end: datetime, overlapping: bool = False) -> List[Dict]:
+        """The recurring part of get_calendar_sessions(), unsorted"""
+        from .ics import event_to_session
+        index = self.calendar_index
+        sessions = []
+        for event in index.series_between(start, end):
+            session = event_to_session(event)
+            if session is None:
+                continue
+            length = session['end'] - session['start']
+            expand_from = start - length if overlapping else start
+            skip = index.overridden_instances(event['UID']) if event.get('UID') else ()
+            for occurrence in self.occurrences.get(event, expand_from, end):
+                if occurrence in skip or (occurrence < start and occurrence + length <= start):
+                    continue
+                sessions.append({**session, 'start': occurrence, 'end': occurrence + length})
+        return sessions
+
+    def find_double_bookings(self, sessions: List[Dict]) -> List[List[Dict]]:
+        """Groups of two or more sessions whose times overlap"""
+        groups, current, current_end = [], [], None
+        for session in sorted(sessions, key=lambda session: session['start']):
+            if current and session['start'] < current_end:
+                current.append(session)
+                current_end = max(current_end, session['end'])
+                continue
+            if len(current) > 1:
+                groups.append(current)
+            current, current_end = [session], session['end']
+        if len(current) > 1:
+            groups.append(current)
+        return groups
+
+    def plan_session(self, session: Dict) -> Tuple[int, int, int, str]:
+        """(start_minute, length_minutes, tokens, model) for TokenWindow.project()"""
+        metadata = self.parse_session_metadata(session['title'], session['description'])
+        prediction = self.predict_session_tokens(session['duration_hours'], metadata, session['start'])
+        return (minute_of(session['start']), int(session['duration_hours'] * 60),
+                prediction['base'], metadata.get('model', 'planned'))
+
+    def report_double_bookings(self, sessions: List[Dict], window: TokenWindow):
+        """Warn about overlapping sessions, loudly if together they blow the 5-hour budget"""
+        for group in self.find_double_bookings(sessions):
+            titles = ' + '.join(session['title'] for session in group)
+            when = f"{group[0]['start']:%a} {format_minute(minute_of(group[0]['start']))}"
+            projection = window.project([self.plan_session(session) for session in group])
+            if projection['overflow_minute'] is not None:
+                log(f"   ⚠️  Double-booked {when}: {titles} - together they exceed the 5-hour budget "
+                    f"at {format_minute(projection['overflow_minute'])}", 'red')
+            else:
+                log(f"   ⚠️  Double-booked {when}: {titles}", 'yellow')
+
+    def get_five_hour_limit(self) -> int:
+        """5-hour window limit from quota-tracker.json, as in update-token-tracker.js"""
+        try:
+            quota = json.loads(self.quota_path.read_text())
+            return int(quota.get('limit') or 200000)
+        except (OSError, ValueError, TypeError, AttributeError):
+            return 200000
+
+    def get_current_budget_status(self) -> Dict:
+        """
+        Read real-time token status
+
+        Usage is aggregated live from the Claude Code JSONL logs, tailing each
+        file from its last checkpointed offset, and the result is stored as
+        the binary snapshot behind the fast `status` path. Without a projects
+        directory this falls back to the hourly token-tracker.json snapshot.
+        """
+        if self.projects_path.is_dir():
+            # Signed before refreshing, so anything appended meanwhile invalidates the snapshot
+            signature = usage_signature(str(self.projects_path), str(self.quota_path))
+            if self.usage is None:
+                self.usage = UsageAggregator(self.projects_path, self.usage_checkpoint_path)
+            with self.profiler.stage('usage.refresh'):
+                self.usage.refresh(workers=self.workers)
+            with self.profiler.stage('usage.status'):
+                status = self.usage.status(limit=self.get_five_hour_limit())
+                write_status_snapshot(str(self.status_snapshot_path), status, signature)
+            return status
+
+        if not self.tracker_path.exists():
+            log("⚠️  Token tracker not found. Run: node scripts/update-token-tracker.js", 'yellow')
+            return {
+                'weekly': {'total': 0, 'byModel': {}},
+                'daily': {'total': 0, 'byModel': {}},
+                'fiveHourWindow': {'remaining': 200000, 'limit': 200000}
+            }
+
+        return json.loads(self.tracker_path.read_text())
+
+    def get_token_window(self, budget: Dict) -> TokenWindow:
+        """
+        Five-hour window for rolling simulations
+
+        Built from live minute buckets when usage was aggregated; otherwise the
+        tracker snapshot's used tokens are placed so they expire at resetTime
+        (or, without one, a full window from now).
+        """
+        five_hour = budget['fiveHourWindow']
+        if self.usage is not None:
+            return self.usage.build_window(limit=five_hour['limit'])
+
+        now = minute_of(datetime.now())
+        window = TokenWindow(limit=five_hour['limit'])
+        window.advance(now)
+        used_at = now
+        if five_hour.get('resetTime'):
+            try:
+                reset = datetime.fromisoformat(five_hour['resetTime'].replace('Z', '+00:00'))
+                used_at = min(now, int(reset.timestamp()) // 60 - window.size)
+            except ValueError:
+                pass
+        window.add(used_at, 'tracked', five_hour['limit'] - five_hour['remaining'])
+        return window
+
+    def parse_session_metadata(self, event_title: str, description: str = '') -> Dict:
+        """
+        Extract intelligence from calendar event text
+
+        Supports tags like:
+        - #complexity:high
+        - #project:organized-ai
+        - #tokens:45k
+        - #agents:claude,droid
+        - #model:opus
+        - #priority:p1
+
+        More tags can be added with register_session_tag(). Parsing is one
+        pass of a single compiled pattern, memoised on (title, description).
+        """
+        from .metadata import parse_session_text
+        metadata = parse_session_text(event_title, description)
+        return {key: list(value) if isinstance(value, list) else value for key, value in metadata.items()}
+
+    def predict_session_tokens(self, duration_hours: float, metadata: Dict,
+                               start: Optional[datetime] = None) -> Dict:
+        """
+        Predict token usage for a coding session
+
+        Once `calibrate` has fitted a model, the rate comes from your own
+        history for the session's #project and complexity, scaled by the
+        time-of-day factor for start; otherwise the static token_rates apply.
+
+        Returns:
+            base_estimate: Conservative estimate
+            buffer: Safety margin (20%)
+            max: Worst-case scenario
+            confidence: Prediction confidence (0-1); when calibrated, the share
+                of past sessions that landed within the buffer
+            interval: 80% range of past actual/predicted (calibrated only)
+        """
+        # Use explicit token estimate if provided
+        if 'explicit_tokens' in metadata:
+            base = metadata['explicit_tokens']
+            return {
+                'base': base,
+                'buffer': int(base * 0.2),
+                'max': int(base * 1.3),
+                'confidence': 1.0,
+                'method': 'explicit'
+            }
+
+        # Calculate based on duration and complexity
+        complexity = metadata.get('complexity', 'medium')
+        calibration = self.calibration
+        if calibration is not None:
+            rate = calibration.rate(metadata.get('project'), complexity)
+            factor = calibration.factor(start.hour) if start is not None else 1.0
+            base = int(duration_hours * rate * factor)
+            residual = calibration.residual(complexity)
+            return {
+                'base': base,
+                'buffer': int(base * 0.2),
+                'max': max(int(base * 1.5), int(base * residual['high'])),
+                'confidence': residual['withinBuffer'],
+                'interval': (int(base * residual['low']), int(base * residual['high'])),
+                'method': 'calibrated',
+                'rate_used': f"{rate:.0f}/hour x{factor:g}",
+                'complexity': complexity,
+                'samples': residual['n']
+            }
+
+        rate = self.token_rates[complexity]
+        base = int(duration_hours * rate)
+
+        return {
+            'base': base,
+            'buffer': int(base * 0.2),
+            'max': int(base * 1.5),
+            'confidence': 0.7,  # Lower confidence for rule-based
+            'method': 'rule-based',
+            'rate_used': f"{rate}/hour",
+            'complexity': complexity
+        }
+
+    def estimate_cost(self, tokens: int, model: str = 'sonnet') -> float:
+        """
+        Estimate cost based on token count and model
+        Using pricing from planning docs
+        """
+        # Assume 50/50 split input/output for estimation
+        prices = self.pricing.get(model, self.pricing['sonnet'])
+        avg_price = (prices['input'] + prices['output']) / 2
+
+        return tokens * avg_price
+
+    def predict_sessions_batch(self, durations: Sequence[float], complexities: Sequence[str],
+                               start_times: Sequence[datetime], models: Optional[Sequence[str]] = None,
+                               explicit_tokens: Optional[Sequence[Optional[int]]] = None,
+                               projects: Optional[Sequence[Optional[str]]] = None) -> Dict:
+        """
+        Score many sessions at once with NumPy
+
+        Takes parallel sequences of durations (hours), complexities, start
+        times, models, #tokens estimates and #project tags (None where absent).
+        Returns arrays for base/buffer/max/confidence/cost plus start as
+        datetime64[m], and interval_low/interval_high when calibrated; every
+        element equals what predict_session_tokens() and estimate_cost() give
+        for that session. Raises ImportError when NumPy is not installed.
+        """
+        import numpy as np
+
+        count = len(durations)
+        if models is None:
+            models = ['sonnet'] * count
+        if explicit_tokens is None:
+            explicit_tokens = [None] * count
+        if projects is None:
+            projects = [None] * count
+
+        explicit = np.array([-1 if tokens is None else tokens for tokens in explicit_tokens], dtype=np.int64)
+        has_explicit = explicit >= 0
+        starts = np.array(start_times, dtype='datetime64[m]').reshape(count)
+        calibration = self.calibration
+
+        # Rule-based base: int(duration * rate [* factor]), truncating like the scalar path
+        if calibration is None:
+            levels, level_codes = np.unique(np.asarray(complexities, dtype=str), return_inverse=True)
+            rates = np.array([self.token_rates.get(level, -1) for level in levels], dtype=np.float64)[level_codes]
+        else:
+            keys = [f"{project or ''}\x1f{level}" for project, level in zip(projects, complexities)]
+            pairs, pair_codes = np.unique(np.asarray(keys, dtype=str), return_inverse=True)
+            rates = np.array([
+                calibration.rate(project or None, level) if level in calibration.complexity else -1
+                for project, level in (pair.split('\x1f') for pair in pairs)
+            ], dtype=np.float64)[pair_codes]
+        unknown = (rates < 0) & ~has_explicit
+        if unknown.any():
+            raise KeyError(str(np.asarray(complexities, dtype=str)[unknown][0]))
+        rule_base = np.asarray(durations, dtype=np.float64) * rates
+
+        if calibration is not None:
+            from .calibration import TIME_OF_DAY_BOUNDS, TIME_OF_DAY_NAMES
+            hours = (starts - starts.astype('datetime64[D]')).astype('timedelta64[h]').astype(np.int64)
+            factors = np.array([calibration.time_of_day.get(name, 1.0) for name in TIME_OF_DAY_NAMES])
+            rule_base = rule_base * factors[np.searchsorted(TIME_OF_DAY_BOUNDS, hours, side='right')]
+            levels, level_codes = np.unique(np.asarray(complexities, dtype=str), return_inverse=True)
+            spreads = [calibration.residual(level) if level in calibration.complexity else calibration.residuals['*']
+                       for level in levels]
+            low, high, within = (np.array([spread[key] for spread in spreads], dtype=np.float64)[level_codes]
+                                 for key in ('low', 'high', 'withinBuffer'))
+        rule_base = rule_base.astype(np.int64)
+
+        base = np.where(has_explicit, explicit, rule_base)
+        if calibration is None:
+            maximum = np.where(has_explicit, (base * 1.3).astype(np.int64), (base * 1.5).astype(np.int64))
+            confidence = np.where(has_explicit, 1.0, 0.7)
+        else:
+            calibrated_max = np.maximum((base * 1.5).astype(np.int64), (base * high).astype(np.int64))
+            maximum = np.where(has_explicit, (base * 1.3).astype(np.int64), calibrated_max)
+            confidence = np.where(has_explicit, 1.0, within)
+
+        names, model_codes = np.unique(np.asarray(models, dtype=str), return_inverse=True)
+        avg_prices = np.array([
+            (prices['input'] + prices['output']) / 2
+            for prices in (self.pricing.get(name, self.pricing['sonnet']) for name in names)
+        ], dtype=np.float64)[model_codes]
+
+        result = {
+            'base': base,
+            'buffer': (base * 0.2).astype(np.int64),
+            'max': maximum,
+            'confidence': confidence,
+            'cost': base * avg_prices,
+            'start': starts
+        }
+        if calibration is not None:
+            result['interval_low'] = np.where(has_explicit, base, (base * low).astype(np.int64))
+            result['interval_high'] = np.where(has_explicit, base, (base * high).astype(np.int64))
+        return result
+
+    def calibrate(self, days: int = UsageAggregator.HISTORY_DAYS) -> Optional['TokenCalibration']:
+        """
+        Fit and store token rates from the last `days` of calendar and JSONL history
+
+        Returns the new model, or None (leaving any previous one in place) when
+        too few past sessions can be matched to recorded usage. Raises
+        ImportError when NumPy is not installed.
+        """
+        from .calibration import fit_token_calibration
+        if not self.projects_path.is_dir():
+            return None
+        if self.usage is None:
+            self.usage = UsageAggregator(self.projects_path, self.usage_checkpoint_path)
+        with self.profiler.stage('usage.refresh'):
+            self.usage.refresh(workers=self.workers)
+
+        now = datetime.now()
+        days = min(days, UsageAggregator.HISTORY_DAYS)
+        sessions = [session for session in self.get_calendar_sessions(now - timedelta(days=days), now)
+                    if session['end'] <= now]
+        metadata = [self.parse_session_metadata(s['title'], s['description']) for s in sessions]
+        with self.profiler.stage('calibration.fit'):
+            calibration = fit_token_calibration(
+                self.token_rates,
+                [m.get('project') for m in metadata],
+                [m['complexity'] for m in metadata],
+                [s['start'] for s in sessions],
+                [s['end'] for s in sessions],
+                self.usage.hourly_usage()
+            )
+        if calibration is not None:
+            if not calibration.save(self.calibration_path):
+                log(f"⚠️  Could not write {self.calibration_path}; the fit is used for this run only", 'yellow')
+            self.calibration = calibration
+        return calibration
+
+    def show_index(self, rebuild: bool = False):
+        """
+        Bring the calendar index and usage checkpoint up to date, reporting throughput
+
+        With rebuild=True both are discarded first, forcing a full first-time
+        ingest of every .ics and .jsonl file.
+        """
+        from .index import CalendarIndex
+
+        log("\n📥 Indexing calendars and usage logs", 'bold')
+        log("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n", 'cyan')
+        if rebuild:
+            for path in (self.calendar_index_path, self.usage_checkpoint_path, self.status_snapshot_path):
+                if path.exists():
+                    path.unlink()
+
+        def throughput(stats: Dict) -> str:
+            rate = stats['bytes'] / max(stats['seconds'], 1e-9) / 1e6
+            return (f"{stats['bytes'] / 1e6:,.1f} MB in {stats['seconds']:.2f}s "
+                    f"({rate:,.1f} MB/s, {stats['workers']} worker{'s' if stats['workers'] != 1 else ''})")
+
+        if self.calendar_path is None:
+            log("📅 Calendar: none found - set ICAL_CALENDAR_PATH to a folder of .ics files", 'yellow')
+        else:
+            self._calendar_index = CalendarIndex(self.calendar_index_path)
+            with self.profiler.stage('calendar.index'):
+                stats = self._calendar_index.refresh(self.calendar_path, self.workers, progress=True)
+            log(f"📅 Calendar: {stats['files']:,} file(s) - {stats['parsed']:,} parsed, {stats['resumed']:,} resumed, "
+                f"{stats['skipped']:,} unchanged, {stats['removed']:,} removed", 'cyan')
+            log(f"   {stats['events']:,} events, {throughput(stats)}", 'green')
+
+        if not self.projects_path.is_dir():
+            log(f"📊 Usage: no projects directory at {self.projects_path}", 'yellow')
+        else:
+            self.usage = UsageAggregator(self.projects_path, self.usage_checkpoint_path)
+            with self.profiler.stage('usage.refresh'):
+                stats = self.usage.refresh(workers=self.workers, progress=True)
+            log(f"📊 Usage: {stats['files']:,} file(s) - {stats['tailed']:,} read, {stats['unchanged']:,} unchanged, "
+                f"{stats['reset']:,} reset, {stats['removed']:,} removed", 'cyan')
+            log(f"   {throughput(stats)}", 'green')
+        print()
+
+    def show_calibration(self, days: int = UsageAggregator.HISTORY_DAYS):
+        """Fit token rates from history and show them next to the static ones"""
+        from .calibration import TokenCalibration
+
+        log("\n🎯 Token Rate Calibration", 'bold')
+        log("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n", 'cyan')
+
+        started = time.perf_counter()
+        calibration = self.calibrate(days)
+        elapsed = (time.perf_counter() - started) * 1000
+        if calibration is None:
+            log(f"Not enough past sessions with recorded usage in the last {days} days", 'yellow')
+            log("   Tag calendar events with #project and #complexity, then run this again", 'cyan')
+            return
+
+        log(f"📊 Fitted on {calibration.samples} past session(s) in {elapsed:.0f} ms\n", 'cyan')
+        log("Rates by complexity (tokens/hour):", 'bold')
+        for level, rate in calibration.complexity.items():
+            log(f"   {level:<9} {self.token_rates[level]:>8,} → {rate:>10,.0f}", 'blue')
+        for project, rates in sorted(calibration.projects.items()):
+            fitted = ', '.join(f"{level} {rate:,.0f}" for level, rate in rates.items())
+            log(f"   #{project}: {fitted}", 'blue')
+
+        log("\nTime of day:", 'bold')
+        for name, factor in calibration.time_of_day.items():
+            log(f"   {name:<9} x{factor:.2f}", 'blue')
+
+        spread = calibration.residuals['*']
+        log(f"\n✅ {spread['withinBuffer']*100:.0f}% of past sessions landed within ±20% "
+            f"(80% within x{spread['low']:.2f} - x{spread['high']:.2f})", 'green')
+        stored = TokenCalibration.load(self.calibration_path)
+        if stored is not None and stored.fitted_at == calibration.fitted_at:
+            log(f"   Saved to {self.calibration_path}\n", 'cyan')
+
+    def show_predict_range(self, start: datetime, end: datetime):
+        """Forecast every calendar session in [start, end) with per-day totals"""
+        import numpy as np
+
+        log("\n📈 Token Forecast", 'bold')
+        log(f"   {start:%Y-%m-%d} → {end - timedelta(days=1):%Y-%m-%d}", 'cyan')
+        log("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n", 'cyan')
+
+        # One-off sessions come straight from the indexed epochs; only series are expanded
+        rows, series = [], []
+        if self.calendar_path is not None:
+            index = self.calendar_index  # Refreshed in its own stage, outside calendar.query
+            with self.profiler.stage('calendar.query'):
+                rows = index.session_times(start, end)
+                series = self.get_series_sessions(start, end)
+        if not rows and not series:
+            log("No coding sessions found in this range", 'yellow')
+            return
+
+        # Local wall-clock times, converting each distinct epoch once
+        epochs, epoch_codes = np.unique(np.array([row[:2] for row in rows], dtype=np.float64).reshape(-1),
+                                        return_inverse=True)
+        local = np.array([datetime.fromtimestamp(epoch) for epoch in epochs], dtype='datetime64[s]')[epoch_codes]
+        starts = np.concatenate([local[0::2], np.array([s['start'] for s in series], dtype='datetime64[s]')])
+        ends = np.concatenate([local[1::2], np.array([s['end'] for s in series], dtype='datetime64[s]')])
+
+        # Parse each distinct title/description once and broadcast it to its sessions
+        texts = {}
+        text_codes = np.array([texts.setdefault(text, len(texts)) for text in
+                               [row[2:] for row in rows] + [(s['title'], s['description']) for s in series]],
+                              dtype=np.int64)
+        parsed = [self.parse_session_metadata(title, description) for title, description in texts]
+
+        # Sorted like get_calendar_sessions(), so the float sums come out the same
+        order = np.argsort(starts, kind='stable')
+        starts, ends = starts[order], ends[order]
+        durations = (ends - starts).astype(np.float64) / 3600
+        metadata = [parsed[code] for code in text_codes[order].tolist()]
+
+        started = time.perf_counter()
+        with self.profiler.stage('predict_sessions_batch'):
+            result = self.predict_sessions_batch(
+                durations,
+                [m['complexity'] for m in metadata],
+                starts,
+                [m.get('model', 'sonnet') for m in metadata],
+                explicit_tokens=[m.get('explicit_tokens') for m in metadata],
+                projects=[m.get('project') for m in metadata]
+            )
+
+        days, day_codes = np.unique(result['start'].astype('datetime64[D]'), return_inverse=True)
+        totals = {}
+        for key in ('base', 'max'):
+            totals[key] = np.zeros(len(days), dtype=np.int64)
+            np.add.at(totals[key], day_codes, result[key])
+        totals['cost'] = np.bincount(day_codes, weights=result['cost'], minlength=len(days))
+        counts = np.bincount(day_codes, minlength=len(days))
+        elapsed = (time.perf_counter() - started) * 1000
+
+        for i, day in enumerate(days.astype(datetime)):
+            log(f"  {day:%a %Y-%m-%d}  {counts[i]:>3} session(s)  {int(totals['base'][i]):>10,} tokens "
+                f"(max {int(totals['max'][i]):,})  ${totals['cost'][i]:.2f}", 'blue')
+
+        log(f"\n  Total: {len(starts):,} sessions, {int(result['base'].sum()):,} tokens "
+            f"(max {int(result['max'].sum()):,}), ${result['cost'].sum():.2f}", 'green')
+        log(f"  Scored in {elapsed:.1f} ms\n", 'cyan')
+
+    def show_today_preview(self, budget: Optional[Dict] = None):
+        """Display today's coding sessions with predictions (budget: a status already at hand, e.g. the daemon's)"""
+        log("\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━", 'cyan')
+        log("📅 Today's Coding Sessions - Token Intelligence Preview", 'bold')
+        log("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n", 'cyan')
+
+        # Get current budget status
+        budget = budget or self.get_current_budget_status()
+
+        log("📊 Current Budget Status:", 'cyan')
+        log(f"  Weekly Used: {budget['weekly']['total']:,} tokens", 'blue')
+        log(f"  Daily Used: {budget['daily']['total']:,} tokens", 'blue')
+        log(f"  5-Hour Window: {budget['fiveHourWindow']['remaining']:,} / {budget['fiveHourWindow']['limit']:,} remaining", 'green')
+
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        sessions = self.get_calendar_sessions(today, today + timedelta(days=1))
+
+        if sessions:
+            log(f"\n📅 {len(sessions)} session(s) on your calendar today:\n", 'yellow')
+        else:
+            log("\n💡 Example Session Analysis:", 'yellow')
+            if self.calendar_path is None:
+                log("   (No calendar found - set ICAL_CALENDAR_PATH to a folder of .ics files)\n", 'yellow')
+            else:
+                log(f"   (No sessions today in {self.calendar_path})\n", 'yellow')
+
+            # Demo session
+            sessions = [{
+                'title': 'Build OAuth Integration #complexity:high #project:organized-ai',
+                'start': today.replace(hour=14),
+                'end': today.replace(hour=17),
+                'duration_hours': 3.0,
+                'description': 'Implement OAuth2 flow with token refresh'
+            }]
+
+        total_base = 0
+        planned = []
+        for session in sessions:
+            metadata = self.parse_session_metadata(session['title'], session['description'])
+            prediction = self.predict_session_tokens(session['duration_hours'], metadata, session['start'])
+            total_base += prediction['base']
+            planned.append((
+                minute_of(session['start']), int(session['duration_hours'] * 60),
+                prediction['base'], 'planned'
+            ))
+            start_label = session['start'].strftime('%I:%M %p').lstrip('0')
+
+            log(f"🔨 {session['title']}", 'bold')
+            log(f"   Time: {start_label} ({session['duration_hours']:g}h)", 'cyan')
+            log(f"   Complexity: {metadata['complexity']}", 'yellow')
+            log(f"   Estimated: {prediction['base']:,} tokens (±{prediction['buffer']:,})", 'green')
+            if 'interval' in prediction:
+                low, high = prediction['interval']
+                log(f"   Likely: {low:,} - {high:,} tokens (80% of {prediction['samples']} past sessions)", 'green')
+            log(f"   Max: {prediction['max']:,} tokens", 'red')
+            model = metadata.get('model', 'sonnet')
+            log(f"   Cost: ${self.estimate_cost(prediction['base'], model):.2f} ({model.title()})", 'magenta')
+            log(f"   Confidence: {prediction['confidence']*100:.0f}%\n", 'cyan')
+
+        # Budget impact, rolling the 5-hour window forward across the day
+        window = self.get_token_window(budget)
+        projection = window.project(planned)
+        new_total = budget['daily']['total'] + total_base
+        log("💰 Budget Impact:", 'cyan')
+        log(f"   After today's sessions: {new_total:,} tokens", 'blue')
+        log(f"   5-Hour peak: {projection['peak']:,} / {window.limit:,} tokens "
+            f"at {format_minute(projection['peak_minute'])}", 'green')
+
+        percentage = (projection['peak'] / window.limit) * 100
+        if projection['overflow_minute'] is not None:
+            log(f"   ⚠️  Warning: 5-hour budget exceeded at {format_minute(projection['overflow_minute'])}!", 'red')
+        elif percentage > 90:
+            log(f"   ⚠️  Warning: Would use {percentage:.0f}% of 5-hour budget!", 'red')
+        elif percentage > 75:
+            log(f"   ⚠️  Notice: {percentage:.0f}% of 5-hour budget", 'yellow')
+        else:
+            log(f"   ✅ Safe: {percentage:.0f}% of 5-hour budget", 'green')
+        self.report_double_bookings(sessions, window)
+
+        log("\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━", 'cyan')
+        log("💡 Next Steps:", 'yellow')
+        log("   1. Add calendar events with #complexity tags", 'cyan')
+        log("   2. Run this script before coding sessions", 'cyan')
+        log("   3. Review budget impact predictions", 'cyan')
+        log("   4. Track actual usage with: node scripts/update-token-tracker.js", 'cyan')
+        log("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n", 'cyan')
+
+    def show_week_preview(self, budget: Optional[Dict] = None):
+        """Display this week's coding sessions (Monday to Sunday) with predictions"""
+        log("\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━", 'cyan')
+        log("📅 This Week's Coding Sessions - Token Intelligence Preview", 'bold')
+        log("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n", 'cyan')
+
+        budget = budget or self.get_current_budget_status()
+        week_start = get_week_start(datetime.now())
+        sessions = self.get_calendar_sessions(week_start, week_start + timedelta(days=7))
+        if not sessions:
+            log("No coding sessions on your calendar this week", 'yellow')
+            return
+
+        window = self.get_token_window(budget)
+        week_total = 0
+        for offset in range(7):
+            day = week_start + timedelta(days=offset)
+            day_sessions = [session for session in sessions if session['start'].date() == day.date()]
+            if not day_sessions:
+                continue
+
+            log(f"{day:%A %b %d}", 'bold')
+            day_total = 0
+            for session in day_sessions:
+                _, _, tokens, _ = self.plan_session(session)
+                day_total += tokens
+                log(f"   {format_minute(minute_of(session['start'])):>8}  {session['duration_hours']:>4g}h  "
+                    f"{tokens:>9,} tokens  {session['title']}", 'blue')
+            week_total += day_total
+            log(f"   Day total: {day_total:,} tokens", 'green')
+            self.report_double_bookings(day_sessions, window)
+            print()
+
+        log("💰 Weekly Budget:", 'cyan')
+        log(f"   Used so far: {budget['weekly']['total']:,} tokens", 'blue')
+        log(f"   Planned this week: {week_total:,} tokens", 'green')
+
+    def ask_daemon(self, method: str, params: Optional[Dict] = None):
+        """Result from a running `serve` daemon, or None when none answers"""
+        from .client import DaemonError, daemon_request, default_socket_path
+
+        socket_path = default_socket_path()
+        if not os.path.exists(socket_path):
+            return None
+        try:
+            return daemon_request(method, params, socket_path=socket_path)
+        except (OSError, ValueError, DaemonError):
+            return None
+
+    def interactive_session_planner(self):
+        """Interactive prompt for planning a coding session"""
+        log("\n🎯 Interactive Session Planner", 'bold')
+        log("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n", 'cyan')
+
+        # Budget, window and prediction come from a running `serve` daemon when there is one
+        budget = self.ask_daemon('status')
+        daemon = budget is not None
+        if not daemon:
+            budget = self.get_current_budget_status()
+        log(f"💰 Current budget: {budget['fiveHourWindow']['remaining']:,} tokens remaining\n", 'green')
+
+        # Get session details
+        title = input("📝 Session title: ")
+        duration = float(input("⏱️  Duration (hours): "))
+        complexity = input("🎚️  Complexity (low/medium/high/critical) [medium]: ").strip().lower() or 'medium'
+        start_text = input("🕐 Start time (HH:MM) [now]: ").strip()
+
+        now = datetime.now()
+        start = now
+        if start_text:
+            start = datetime.combine(now.date(), datetime.strptime(start_text, '%H:%M').time())
+
+        # Create metadata
+        metadata = {'complexity': complexity}
+
+        # Predict
+        prediction = None
+        if daemon:
+            prediction = self.ask_daemon('predict', {'duration_hours': duration, 'complexity': complexity,
+                                                     'start': start.isoformat()})
+        if prediction is None:
+            prediction = self.predict_session_tokens(duration, metadata, start)
+
+        # Display results
+        log(f"\n📊 Session Prediction:", 'bold')
+        log(f"   Estimated: {prediction['base']:,} tokens", 'green')
+        log(f"   Buffer: ±{prediction['buffer']:,} tokens", 'yellow')
+        if 'interval' in prediction:
+            low, high = prediction['interval']
+            log(f"   Likely: {low:,} - {high:,} tokens ({prediction['confidence']*100:.0f}% within buffer)", 'yellow')
+        log(f"   Maximum: {prediction['max']:,} tokens", 'red')
+        log(f"   Cost (Sonnet): ${self.estimate_cost(prediction['base'], 'sonnet'):.2f}", 'magenta')
+        log(f"   Cost (Opus): ${self.estimate_cost(prediction['base'], 'opus'):.2f}\n", 'magenta')
+
+        # Budget check: roll the 5-hour window forward across the whole session,
+        # together with any calendar sessions sharing a 5-hour window with it
+        live = self.ask_daemon('window') if daemon else None
+        if live is None:
+            window = self.get_token_window(budget)
+        else:
+            window = TokenWindow(limit=live['limit'])
+            for minute, model, tokens in live['entries']:
+                window.add(minute, model, tokens)
+            window.advance(max(live['head'] or 0, minute_of(datetime.now())))
+        length = max(1, int(duration * 60))
+        session = (max(minute_of(start), window.head), length, prediction['base'], 'planned')
+        window_span = timedelta(minutes=window.size)
+        nearby = self.get_calendar_sessions(start - window_span, start + timedelta(minutes=length) + window_span,
+                                            overlapping=True)
+        projection = window.project([session] + [self.plan_session(other) for other in nearby])
+
+        clashes = [other for other in nearby
+                   if other['start'] < start + timedelta(minutes=length) and other['end'] > start]
+        if clashes:
+            log(f"⚠️  Double-booked with: {', '.join(other['title'] for other in clashes)}", 'yellow')
+        remaining_after = window.limit - projection['peak']
+        percentage = (projection['peak'] / window.limit) * 100
+
+        if projection['overflow_minute'] is not None:
+            log(f"⚠️  WARNING: Session would exceed budget by {abs(remaining_after):,} tokens "
+                f"(from {format_minute(projection['overflow_minute'])})!", 'red')
+            # Search past the planned window too: moving the session later can run into other sessions
+            later = self.get_calendar_sessions(start - window_span, start + timedelta(days=1), overlapping=True)
+            earliest = window.earliest_start(session[0], length, prediction['base'],
+                                             planned=[self.plan_session(other) for other in later])
+            if earliest is None:
+                log("   It never fits a 5-hour window alongside your other sessions - consider splitting it", 'yellow')
+            else:
+                log(f"   Capacity frees up for this session at {format_minute(earliest)}", 'yellow')
+        elif percentage > 75:
+            log(f"⚠️  Notice: 5-hour window will peak at {percentage:.0f}% during this session", 'yellow')
+        else:
+            log(f"✅ Safe: {remaining_after:,} tokens remaining after session", 'green')
+
+        # Calendar event suggestion
+        log(f"\n📅 Suggested Calendar Event:", 'cyan')
+        log(f"   {title} #complexity:{complexity} #tokens:{prediction['base']//1000}k", 'blue')
+        print()
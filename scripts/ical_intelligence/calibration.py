@@ -0,0 +1,214 @@
+"""Token rates learned from calendar and usage history"""
+
+import os
+import json
+import bisect
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+TIME_OF_DAY_BOUNDS = (5, 9, 12, 17, 21)
+TIME_OF_DAY_NAMES = ('night', 'early', 'morning', 'afternoon', 'evening', 'night')
+
+def time_of_day(hour: int) -> str:
+    """Bucket a local hour: early 5-9, morning 9-12, afternoon 12-17, evening 17-21, night otherwise"""
+    return TIME_OF_DAY_NAMES[bisect.bisect_right(TIME_OF_DAY_BOUNDS, hour)]
+
+def project_matches(directory: str, tag: str) -> bool:
+    """
+    Whether a ~/.claude/projects directory belongs to a #project tag
+
+    Directory names are the project path with separators turned into
+    dashes, so the tag must be the whole name or its trailing components:
+    'website' matches '-home-me-website' but not '-home-me-website-old'.
+    """
+    return directory == tag or directory.endswith('-' + tag)
+
+class TokenCalibration:
+    """
+    Learned token rates, written by fit_token_calibration()
+
+    Holds per-complexity rates, per-project overrides, time-of-day factors
+    and the residual spread (actual / predicted) that predictions turn into
+    a confidence and interval. Stored as a few hundred bytes of JSON so
+    loading it on every run costs microseconds.
+    """
+
+    VERSION = 1
+    MIN_RESIDUAL_SAMPLES = 5  # Below this, a complexity uses the global residuals
+
+    def __init__(self, complexity: Dict[str, float], projects: Dict[str, Dict[str, float]],
+                 time_of_day: Dict[str, float], residuals: Dict[str, Dict], samples: int,
+                 fitted_at: Optional[str] = None):
+        self.complexity = complexity
+        self.projects = projects
+        self.time_of_day = time_of_day
+        self.residuals = residuals
+        self.samples = samples
+        self.fitted_at = fitted_at or datetime.now().isoformat(timespec='seconds')
+
+    @classmethod
+    def load(cls, path: Path) -> Optional['TokenCalibration']:
+        """The stored model, or None if there is none (or it is from another version)"""
+        try:
+            data = json.loads(Path(path).read_text())
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get('version') != cls.VERSION:
+            return None
+        return cls(data['complexity'], data['projects'], data['timeOfDay'],
+                   data['residuals'], data['samples'], data['fittedAt'])
+
+    def save(self, path: Path) -> bool:
+        """Atomically write the model (through a per-process temp file); False if it could not be written"""
+        path = Path(path)
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps({
+                'version': self.VERSION,
+                'fittedAt': self.fitted_at,
+                'samples': self.samples,
+                'complexity': self.complexity,
+                'projects': self.projects,
+                'timeOfDay': self.time_of_day,
+                'residuals': self.residuals
+            }, indent=2))
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            return False
+        return True
+
+    def rate(self, project: Optional[str], complexity: str) -> float:
+        """Tokens per hour for a #project/#complexity pair (KeyError for unknown complexity)"""
+        rate = self.projects.get(project, {}).get(complexity) if project else None
+        return self.complexity[complexity] if rate is None else rate
+
+    def factor(self, hour: int) -> float:
+        """Multiplier for sessions starting at a local hour"""
+        return self.time_of_day.get(time_of_day(hour), 1.0)
+
+    def residual(self, complexity: str) -> Dict:
+        """{low, high, withinBuffer, n} for a complexity, or the global spread if it has too few samples"""
+        residual = self.residuals.get(complexity)
+        if residual is None or residual['n'] < self.MIN_RESIDUAL_SAMPLES:
+            residual = self.residuals['*']
+        return residual
+
+def fit_token_calibration(token_rates: Dict[str, int], projects: Sequence[Optional[str]],
+                          complexities: Sequence[str], starts: Sequence[datetime], ends: Sequence[datetime],
+                          usage: Dict[str, Dict[str, int]], prior_weight: float = 3.0,
+                          min_samples: int = 5) -> Optional[TokenCalibration]:
+    """
+    Fit token rates from past sessions and the hourly usage they coincided with
+
+    A session's actual usage is the JSONL usage inside its time range, taken
+    from the project directories named after its #project tag (see
+    project_matches(); every project when untagged), interpolating within
+    partial hours. Rates are
+    fitted in stages, each a per-group mean shrunk toward the stage before
+    by prior_weight pseudo-sessions: complexity (toward token_rates), then
+    project x complexity, then time-of-day factors (toward 1.0). Returns None
+    when fewer than min_samples sessions have any usage.
+    """
+    import numpy as np
+
+    levels = list(token_rates)
+    level_index = {level: i for i, level in enumerate(levels)}
+    tags = sorted({project for project in projects if project})
+    tag_index = {tag: i + 1 for i, tag in enumerate(tags)}
+
+    start_hours = np.array([moment.timestamp() for moment in starts], dtype=np.float64) / 3600
+    end_hours = np.array([moment.timestamp() for moment in ends], dtype=np.float64) / 3600
+    codes = np.array([level_index.get(level, -1) for level in complexities], dtype=np.int64)
+    rows = np.array([tag_index.get(project, 0) if project else 0 for project in projects], dtype=np.int64)
+    buckets = np.searchsorted(TIME_OF_DAY_BOUNDS, [moment.hour for moment in starts], side='right')
+    if len(start_hours) == 0:
+        return None
+
+    # Hourly usage matrix: row 0 sums every project, row i the directories matching tags[i - 1]
+    first = int(np.floor(start_hours.min()))
+    span = int(np.ceil(end_hours.max())) - first + 1
+    matrix = np.zeros((len(tags) + 1, span), dtype=np.float64)
+    for name, hours in usage.items():
+        if not hours:
+            continue
+        offsets = np.fromiter((int(hour) for hour in hours), dtype=np.int64, count=len(hours)) - first
+        tokens = np.fromiter(hours.values(), dtype=np.float64, count=len(hours))
+        inside = (offsets >= 0) & (offsets < span)
+        lowered = name.lower()
+        for row in [0] + [tag_index[tag] for tag in tags if project_matches(lowered, tag.lower())]:
+            matrix[row, offsets[inside]] += tokens[inside]
+    cumulative = np.concatenate([np.zeros((len(matrix), 1)), np.cumsum(matrix, axis=1)], axis=1)
+
+    def usage_until(hour: np.ndarray) -> np.ndarray:
+        position = np.clip(hour - first, 0, span)
+        whole = np.minimum(position.astype(np.int64), span - 1)
+        return cumulative[rows, whole] + (position - whole) * matrix[rows, whole]
+
+    actual = usage_until(end_hours) - usage_until(start_hours)
+    duration = end_hours - start_hours
+    keep = (actual > 0) & (duration > 0) & (codes >= 0)
+    if keep.sum() < min_samples:
+        return None
+    actual, duration, codes, rows, buckets = actual[keep], duration[keep], codes[keep], rows[keep], buckets[keep]
+    observed = actual / duration
+
+    # Complexity rates, shrunk toward the static token_rates
+    prior = np.array([token_rates[level] for level in levels], dtype=np.float64)
+    counts = np.bincount(codes, minlength=len(levels))
+    level_rates = (np.bincount(codes, weights=observed, minlength=len(levels)) + prior_weight * prior) \
+        / (counts + prior_weight)
+
+    # Project x complexity rates, shrunk toward their complexity rate; untagged sessions keep it
+    pairs = rows * len(levels) + codes
+    cells = (len(tags) + 1) * len(levels)
+    pair_counts = np.bincount(pairs, minlength=cells)
+    pair_rates = (np.bincount(pairs, weights=observed, minlength=cells) + prior_weight * np.tile(level_rates, len(tags) + 1)) \
+        / (pair_counts + prior_weight)
+    pair_rates[:len(levels)] = level_rates
+    rate = pair_rates[pairs]
+
+    # Time-of-day factors on what is left, shrunk toward 1.0
+    bucket_names = list(dict.fromkeys(TIME_OF_DAY_NAMES[1:]))
+    bucket_codes = np.array([bucket_names.index(name) for name in TIME_OF_DAY_NAMES])[buckets]
+    ratio = observed / rate
+    bucket_counts = np.bincount(bucket_codes, minlength=len(bucket_names))
+    factors = (np.bincount(bucket_codes, weights=ratio, minlength=len(bucket_names)) + prior_weight) \
+        / (bucket_counts + prior_weight)
+
+    # Residual spread of the full model; its 80% band becomes the prediction interval
+    residual = observed / (rate * factors[bucket_codes])
+
+    def spread(ratios: np.ndarray) -> Dict:
+        return {
+            'low': round(float(np.quantile(ratios, 0.1)), 4),
+            'high': round(float(np.quantile(ratios, 0.9)), 4),
+            'withinBuffer': round(float(np.mean(np.abs(ratios - 1) <= 0.2)), 4),
+            'n': int(len(ratios))
+        }
+
+    residuals = {'*': spread(residual)}
+    for i, level in enumerate(levels):
+        if counts[i]:
+            residuals[level] = spread(residual[codes == i])
+
+    project_rates = {}
+    for tag in tags:
+        row = tag_index[tag]
+        fitted = {level: round(float(pair_rates[row * len(levels) + i]), 1)
+                  for i, level in enumerate(levels) if pair_counts[row * len(levels) + i]}
+        if fitted:
+            project_rates[tag] = fitted
+
+    return TokenCalibration(
+        complexity={level: round(float(level_rates[i]), 1) for i, level in enumerate(levels)},
+        projects=project_rates,
+        time_of_day={name: round(float(factors[i]), 4) for i, name in enumerate(bucket_names)},
+        residuals=residuals,
+        samples=int(keep.sum())
+    )
@@ -0,0 +1,103 @@
+"""Command-line entry point"""
+
+import sys
+import json
+from datetime import datetime, timedelta
+
+from .bridge import iCalTokenBridge
+from .output import log
+from .profiling import StageProfiler
+from .usage import UsageAggregator
+
+PROFILED_METHODS = ('parse_session_metadata', 'predict_session_tokens', 'estimate_cost')
+
+def main():
+    bridge = iCalTokenBridge()
+
+    # --profile[=FILE] (any position): per-stage timings on stderr, optionally saved as JSON
+    profile = [arg for arg in sys.argv[1:] if arg == '--profile' or arg.startswith('--profile=')]
+    if profile:
+        sys.argv = [arg for arg in sys.argv if arg not in profile]
+        bridge.profiler = StageProfiler(enabled=True)
+        bridge.profiler.instrument(bridge, *PROFILED_METHODS)
+        try:
+            run(bridge)
+        finally:
+            bridge.profiler.report(profile[-1].partition('=')[2] or None)
+    else:
+        run(bridge)
+
+def run(bridge: iCalTokenBridge):
+    if len(sys.argv) < 2:
+        command = 'today'
+    else:
+        command = sys.argv[1]
+
+    if command == 'today':
+        bridge.show_today_preview()
+    elif command == 'week':
+        bridge.show_week_preview()
+    elif command == 'plan':
+        bridge.interactive_session_planner()
+    elif command == 'status':
+        budget = bridge.get_current_budget_status()
+        print(json.dumps(budget, indent=2))
+    elif command == 'predict':
+        import argparse
+        parser = argparse.ArgumentParser(prog='ical-intelligence.py predict')
+        parser.add_argument('--range', nargs=2, metavar=('START', 'END'),
+                            help='First and last day to forecast (YYYY-MM-DD); defaults to the next 7 days')
+        args = parser.parse_args(sys.argv[2:])
+
+        if args.range:
+            start, end = (datetime.strptime(day, '%Y-%m-%d') for day in args.range)
+        else:
+            start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            end = start + timedelta(days=6)
+        try:
+            bridge.show_predict_range(start, end + timedelta(days=1))
+        except ImportError:
+            log("predict needs NumPy: pip install numpy", 'red')
+    elif command == 'calibrate':
+        import argparse
+        parser = argparse.ArgumentParser(prog='ical-intelligence.py calibrate')
+        parser.add_argument('--days', type=int, default=UsageAggregator.HISTORY_DAYS,
+                            help=f'History to fit on (max {UsageAggregator.HISTORY_DAYS})')
+        args = parser.parse_args(sys.argv[2:])
+        try:
+            bridge.show_calibration(args.days)
+        except ImportError:
+            log("calibrate needs NumPy: pip install numpy", 'red')
+    elif command == 'index':
+        import argparse
+        parser = argparse.ArgumentParser(prog='ical-intelligence.py index')
+        parser.add_argument('--workers', type=int,
+                            help='Parallel ingestion processes (default: one per CPU for large backlogs)')
+        parser.add_argument('--rebuild', action='store_true', help='Discard the index and checkpoint first')
+        args = parser.parse_args(sys.argv[2:])
+        bridge.workers = args.workers
+        bridge.show_index(args.rebuild)
+    elif command == 'serve':
+        import argparse
+        from .daemon import serve
+        parser = argparse.ArgumentParser(prog='ical-intelligence.py serve')
+        parser.add_argument('--socket', help='Socket path (default: ~/.claude/ical-intelligence.sock)')
+        parser.add_argument('--poll', action='store_true', help='Poll for changes instead of using inotify')
+        parser.add_argument('--interval', type=float, default=2.0, help='Polling interval in seconds')
+        args = parser.parse_args(sys.argv[2:])
+        try:
+            serve(args.socket, args.interval, args.poll)
+        except RuntimeError as error:
+            log(str(error), 'red')
+    else:
+        log(f"Unknown command: {command}", 'red')
+        log("\nUsage:", 'cyan')
+        log("  python scripts/ical-intelligence.py today   # Preview today's sessions", 'blue')
+        log("  python scripts/ical-intelligence.py week    # Preview this week's sessions", 'blue')
+        log("  python scripts/ical-intelligence.py plan    # Interactive planner", 'blue')
+        log("  python scripts/ical-intelligence.py status  # Show current budget", 'blue')
+        log("  python scripts/ical-intelligence.py predict [--range START END]  # Forecast sessions", 'blue')
+        log("  python scripts/ical-intelligence.py calibrate [--days N]  # Learn token rates from history", 'blue')
+        log("  python scripts/ical-intelligence.py index [--workers N] [--rebuild]  # Ingest calendars and logs", 'blue')
+        log("  python scripts/ical-intelligence.py serve [--poll]  # Keep state in memory behind a local socket", 'blue')
+        log("  Add --profile[=FILE] to any command for per-stage timings", 'blue')
@@ -0,0 +1,43 @@
+"""
+Thin client for the `serve` daemon
+
+One JSON object per line in each direction:
+    -> {"method": "status", "params": {}}
+    <- {"ok": true, "result": {...}}   or   {"ok": false, "error": "..."}
+"""
+
+import os
+from typing import Dict, Optional
+
+class DaemonError(Exception):
+    """The daemon answered, but with an error"""
+
+def default_socket_path() -> str:
+    """ICAL_SOCKET_PATH, or ~/.claude/ical-intelligence.sock"""
+    return os.environ.get('ICAL_SOCKET_PATH') or os.path.join(
+        os.path.expanduser('~'), '.claude', 'ical-intelligence.sock'
+    )
+
+def daemon_request(method: str, params: Optional[Dict] = None, socket_path: Optional[str] = None,
+                   timeout: float = 5.0):
+    """
+    Send one request to a running daemon and return its result
+
+    Raises OSError when no daemon is listening (or it timed out) and
+    DaemonError when it rejected the request.
+    """
+    import json
+    import socket
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path or default_socket_path())
+        sock.sendall(json.dumps({'method': method, 'params': params or {}}).encode() + b'\n')
+        with sock.makefile('rb') as stream:
+            line = stream.readline()
+    if not line:
+        raise ConnectionError('daemon closed the connection')
+    response = json.loads(line)
+    if not response.get('ok'):
+        raise DaemonError(response.get('error', 'unknown error'))
+    return response['result']
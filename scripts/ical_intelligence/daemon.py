@@ -0,0 +1,221 @@
+"""
+`serve`: the bridge kept in memory behind a Unix domain socket
+
+The calendar folder and ~/.claude/projects are watched (inotify, or polling
+where that is unavailable). Changes are applied shortly after they happen,
+which also keeps the status snapshot fresh for the fast `status` path, and
+again lazily before any query that depends on them. Refreshes and queries
+run on executor threads, one at a time, so a slow re-index never stalls
+the event loop: the watcher keeps reading and `ping` keeps answering.
+"""
+
+import io
+import os
+import json
+import time
+import signal
+import asyncio
+import threading
+from contextlib import redirect_stdout
+from datetime import datetime
+from typing import Dict, Optional
+
+from .bridge import iCalTokenBridge
+from .client import DaemonError, daemon_request, default_socket_path
+from .output import log
+from .watch import create_watcher
+
+class IntelligenceServer:
+    """
+    JSON-lines request handler around one long-lived iCalTokenBridge
+
+    Methods: ping, status, predict (title, description, duration_hours and
+    optional start, complexity, tokens), window (the live five-hour
+    window's buckets), today and week (rendered previews, exactly as the
+    CLI prints them).
+    """
+
+    DEBOUNCE_SECONDS = 0.5
+    MAX_REQUEST_BYTES = 1 << 20
+    LOCK_FREE_METHODS = {'ping'}  # Answered even while a refresh holds the bridge
+
+    def __init__(self, bridge: iCalTokenBridge, socket_path: Optional[str] = None,
+                 interval: float = 2.0, polling: bool = False):
+        self.bridge = bridge
+        self.socket_path = socket_path or default_socket_path()
+        self.interval = interval
+        self.polling = polling
+        self.dirty = {'calendar': False, 'usage': True}
+        self.status_cache = None  # (epoch minute, status)
+        self.pending = None
+        self.started = time.time()
+        self.requests = 0
+        self.watcher_kind = None
+        self.lock = threading.Lock()  # Held while anything touches the bridge
+        self.methods = {
+            'ping': self.ping,
+            'status': lambda params: self.budget_status(),
+            'predict': self.predict,
+            'window': self.token_window,
+            'today': lambda params: self.render(lambda: self.bridge.show_today_preview(self.budget_status())),
+            'week': lambda params: self.render(lambda: self.bridge.show_week_preview(self.budget_status()))
+        }
+
+    def on_change(self, label: str):
+        """Watcher callback: mark the source stale and schedule a debounced refresh"""
+        self.dirty[label] = True
+        if self.pending is None:
+            self.pending = asyncio.get_running_loop().call_later(self.DEBOUNCE_SECONDS, self.start_refresh)
+
+    def start_refresh(self):
+        """Debounce timer: run refresh() on an executor thread"""
+        self.pending = None
+        asyncio.get_running_loop().run_in_executor(None, self.refresh)
+
+    def refresh(self):
+        """Apply pending changes now rather than on the next query"""
+        with self.lock:
+            self.apply_calendar_changes()
+            if self.dirty['usage']:
+                self.budget_status()
+
+    def warm_up(self):
+        """Build the calendar index and aggregate usage, off the event loop"""
+        with self.lock:
+            if self.bridge.calendar_path is not None:
+                self.bridge.calendar_index
+        self.refresh()
+
+    def apply_calendar_changes(self):
+        if self.dirty['calendar']:
+            self.dirty['calendar'] = False
+            self.bridge.refresh_calendar()
+
+    def budget_status(self) -> Dict:
+        """
+        Live status, re-aggregated only after the logs changed
+
+        Otherwise the in-memory buckets are re-read once a minute so tokens
+        still leave the 5-hour window on time.
+        """
+        minute = int(time.time() // 60)
+        if self.dirty['usage'] or self.bridge.usage is None or self.status_cache is None:
+            self.dirty['usage'] = False
+            self.status_cache = (minute, self.bridge.get_current_budget_status())
+        elif self.status_cache[0] != minute:
+            self.status_cache = (minute, self.bridge.usage.status(limit=self.bridge.get_five_hour_limit()))
+        return self.status_cache[1]
+
+    def ping(self, params: Dict) -> Dict:
+        return {
+            'pid': os.getpid(),
+            'uptime': round(time.time() - self.started, 1),
+            'requests': self.requests,
+            'watcher': self.watcher_kind
+        }
+
+    def predict(self, params: Dict) -> Dict:
+        metadata = self.bridge.parse_session_metadata(params.get('title', ''), params.get('description', ''))
+        if 'complexity' in params:
+            metadata['complexity'] = params['complexity']
+        if 'tokens' in params:
+            metadata['explicit_tokens'] = int(params['tokens'])
+        start = datetime.fromisoformat(params['start']) if params.get('start') else None
+        prediction = self.bridge.predict_session_tokens(float(params['duration_hours']), metadata, start)
+        model = metadata.get('model', 'sonnet')
+        return {**prediction, 'model': model, 'cost': self.bridge.estimate_cost(prediction['base'], model)}
+
+    def token_window(self, params: Dict) -> Dict:
+        """The live five-hour window as (minute, model, tokens) buckets, for the planner"""
+        window = self.bridge.get_token_window(self.budget_status())
+        return {'limit': window.limit, 'head': window.head, 'entries': window.entries()}
+
+    def render(self, show) -> str:
+        """Run a show_*() preview and return what it printed (on an executor thread, under the lock)"""
+        self.apply_calendar_changes()
+        buffer = io.StringIO()
+        with redirect_stdout(buffer):
+            show()
+        return buffer.getvalue()
+
+    def dispatch(self, request) -> Dict:
+        """Answer one request; called from executor threads"""
+        method = request.get('method') if isinstance(request, dict) else None
+        if method not in self.methods:
+            return {'ok': False, 'error': f'unknown method: {method}'}
+        params = request.get('params') or {}
+        try:
+            if method in self.LOCK_FREE_METHODS:
+                return {'ok': True, 'result': self.methods[method](params)}
+            with self.lock:
+                return {'ok': True, 'result': self.methods[method](params)}
+        except Exception as error:  # A bad query must not take the daemon down
+            return {'ok': False, 'error': f'{type(error).__name__}: {error}'}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.requests += 1
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    response = {'ok': False, 'error': 'invalid JSON'}
+                else:
+                    response = await loop.run_in_executor(None, self.dispatch, request)
+                writer.write(json.dumps(response, default=str).encode() + b'\n')
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def claim_socket(self):
+        """Remove a stale socket file; refuse to start if another daemon answers on it"""
+        if not os.path.exists(self.socket_path):
+            os.makedirs(os.path.dirname(self.socket_path) or '.', exist_ok=True)
+            return
+        try:
+            daemon_request('ping', socket_path=self.socket_path, timeout=1.0)
+        except (OSError, ValueError):
+            os.unlink(self.socket_path)
+            return
+        except DaemonError:
+            pass
+        raise RuntimeError(f'a daemon is already listening on {self.socket_path}')
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        self.claim_socket()
+        server = await asyncio.start_unix_server(self.handle, path=self.socket_path, limit=self.MAX_REQUEST_BYTES)
+        os.chmod(self.socket_path, 0o600)
+
+        calendar_path = self.bridge.calendar_path
+        watcher, self.watcher_kind = create_watcher(
+            {'calendar': str(calendar_path) if calendar_path else None, 'usage': str(self.bridge.projects_path)},
+            self.on_change, self.interval, self.polling
+        )
+        watcher.start(loop)
+        # Index the calendar and aggregate usage before the first query arrives
+        loop.run_in_executor(None, self.warm_up)
+
+        stop = loop.create_future()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, lambda: stop.done() or stop.set_result(None))
+        log(f"🛰️  Serving on {self.socket_path} ({self.watcher_kind} file watching)", 'green')
+        try:
+            await stop
+        finally:
+            watcher.close()
+            server.close()
+            await server.wait_closed()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            log(f"Stopped after {self.requests:,} request(s)", 'cyan')
+
+def serve(socket_path: Optional[str] = None, interval: float = 2.0, polling: bool = False):
+    """Run the daemon in the foreground until SIGINT/SIGTERM"""
+    asyncio.run(IntelligenceServer(iCalTokenBridge(), socket_path, interval, polling).serve())
@@ -0,0 +1,497 @@
+"""
+iCalendar (.ics) parsing and recurrence expansion
+
+Streaming VEVENT reader, date/time resolution in the event's own TZID, and
+RRULE/RDATE/EXDATE expansion limited to a requested window.
+"""
+
+import re
+import heapq
+import calendar
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from pathlib import Path
+from typing import List, Dict, Optional, Iterator, Tuple
+
+# VEVENT properties kept in the index; everything else is dropped while parsing
+VEVENT_PROPERTIES = {
+    'UID', 'SUMMARY', 'DESCRIPTION', 'STATUS', 'DTSTART', 'DTEND', 'DURATION',
+    'RRULE', 'RDATE', 'EXDATE', 'RECURRENCE-ID', 'SEQUENCE', 'LAST-MODIFIED'
+}
+DATETIME_PROPERTIES = {'DTSTART', 'DTEND', 'RECURRENCE-ID'}
+MULTI_VALUE_PROPERTIES = {'RDATE', 'EXDATE'}
+TEXT_PROPERTIES = {'SUMMARY', 'DESCRIPTION'}
+
+def iter_ics_lines(path: Path, start_offset: int = 0) -> Iterator[Tuple[int, str]]:
+    """
+    Stream unfolded content lines from an .ics file
+
+    Yields (end_offset, line) where end_offset is the byte position just past
+    the logical line, so callers can checkpoint and resume mid-file.
+    """
+    with open(path, 'rb') as f:
+        f.seek(start_offset)
+        offset = start_offset
+        pending = None
+        for raw in f:
+            line_start = offset
+            offset += len(raw)
+            # RFC 5545 folding: continuation lines start with a space or tab
+            if pending is not None and raw[:1] in (b' ', b'\t'):
+                pending += raw[1:].rstrip(b'\r\n')
+                continue
+            if pending is not None:
+                yield line_start, pending.decode('utf-8', 'replace')
+            pending = raw.rstrip(b'\r\n')
+        if pending is not None:
+            yield offset, pending.decode('utf-8', 'replace')
+
+def parse_ics_property(line: str) -> Tuple[str, Dict[str, str], str]:
+    """Split a content line into (NAME, params, value)"""
+    if '"' in line:
+        # Quoted parameter values may contain ':' themselves
+        in_quotes = False
+        split_at = -1
+        for i, ch in enumerate(line):
+            if ch == '"':
+                in_quotes = not in_quotes
+            elif ch == ':' and not in_quotes:
+                split_at = i
+                break
+    else:
+        split_at = line.find(':')
+    if split_at < 0:
+        return line.upper(), {}, ''
+
+    name, *raw_params = line[:split_at].split(';')
+    params = {}
+    for param in raw_params:
+        key, _, value = param.partition('=')
+        params[key.upper()] = value.strip('"')
+    return name.upper(), params, line[split_at + 1:]
+
+def unescape_ics_text(value: str) -> str:
+    """Undo RFC 5545 TEXT escaping"""
+    if '\\' not in value:
+        return value
+    return re.sub(r'\\([\\;,nN])', lambda m: '\n' if m.group(1) in 'nN' else m.group(1), value)
+
+def iter_vevents(path: Path, start_offset: int = 0) -> Iterator[Tuple[Dict, int]]:
+    """
+    Stream VEVENTs out of an .ics file without loading it into memory
+
+    Yields (event, end_offset) where end_offset is the byte position just past
+    the event's END:VEVENT line. Date-time properties are kept as
+    [value, tzid] pairs and resolved lazily by parse_ics_datetime().
+    """
+    event = None
+    depth = 0  # Nested components inside the VEVENT (VALARM etc.)
+
+    for end_offset, line in iter_ics_lines(path, start_offset):
+        if event is None:
+            if line == 'BEGIN:VEVENT':
+                event = {}
+                depth = 0
+            continue
+
+        if line.startswith('BEGIN:'):
+            depth += 1
+            continue
+        if line.startswith('END:'):
+            if depth:
+                depth -= 1
+                continue
+            yield event, end_offset
+            event = None
+            continue
+        if depth:
+            continue
+
+        name, params, value = parse_ics_property(line)
+        if name not in VEVENT_PROPERTIES:
+            continue
+        if name in TEXT_PROPERTIES:
+            event[name] = unescape_ics_text(value)
+        elif name in DATETIME_PROPERTIES:
+            event[name] = [value, params.get('TZID')]
+        elif name in MULTI_VALUE_PROPERTIES:
+            tzid = params.get('TZID')
+            event.setdefault(name, []).extend([v, tzid] for v in value.split(',') if v)
+        else:
+            event[name] = value
+
+def resolve_ics_datetime(value: str, tzid: Optional[str] = None) -> Tuple[Optional[datetime], Optional[tzinfo]]:
+    """
+    Parse an iCal DATE or DATE-TIME into (wall-clock time, zone)
+
+    The zone is UTC for a trailing Z, the TZID's zone when it is known, and
+    None for floating times and dates. Unknown TZIDs (e.g. Windows zone
+    names) are treated as floating.
+    """
+    value = value.strip()
+    try:
+        if len(value) == 8:
+            return datetime.strptime(value, '%Y%m%d'), None
+        if value.endswith('Z'):
+            return datetime.strptime(value[:-1], '%Y%m%dT%H%M%S'), timezone.utc
+        moment = datetime.strptime(value, '%Y%m%dT%H%M%S')
+    except ValueError:
+        return None, None
+
+    zone = None
+    if tzid:
+        try:
+            from zoneinfo import ZoneInfo
+            zone = ZoneInfo(tzid)
+        except (ImportError, KeyError, ValueError):
+            pass
+    return moment, zone
+
+def to_local(moment: datetime, zone: Optional[tzinfo]) -> datetime:
+    """Wall-clock time in zone -> naive local time"""
+    if zone is None:
+        return moment
+    return moment.replace(tzinfo=zone).astimezone().replace(tzinfo=None)
+
+def from_local(moment: datetime, zone: Optional[tzinfo]) -> datetime:
+    """Naive local time -> wall-clock time in zone"""
+    if zone is None:
+        return moment
+    return moment.astimezone(zone).replace(tzinfo=None)
+
+def parse_ics_datetime(value: str, tzid: Optional[str] = None) -> Optional[datetime]:
+    """
+    Convert an iCal DATE or DATE-TIME to a naive local datetime
+
+    Handles UTC (trailing Z), TZID-qualified and floating times. Unknown
+    TZIDs (e.g. Windows zone names) are treated as floating.
+    """
+    moment, zone = resolve_ics_datetime(value, tzid)
+    if moment is None:
+        return None
+    return to_local(moment, zone)
+
+def parse_ics_duration(value: str) -> Optional[timedelta]:
+    """Parse an RFC 5545 DURATION such as PT1H30M or P1D"""
+    match = re.fullmatch(
+        r'([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?',
+        value.strip()
+    )
+    if not match:
+        return None
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    delta = timedelta(
+        weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+        minutes=int(minutes or 0), seconds=int(seconds or 0)
+    )
+    return -delta if sign == '-' else delta
+
+def event_to_session(event: Dict) -> Optional[Dict]:
+    """
+    Turn a parsed VEVENT into a coding session dict
+
+    All-day and cancelled events are not coding sessions and return None.
+    """
+    if event.get('STATUS', '').upper() == 'CANCELLED' or 'DTSTART' not in event:
+        return None
+    value, tzid = event['DTSTART']
+    if len(value.strip()) == 8:
+        return None
+    start = parse_ics_datetime(value, tzid)
+    if start is None:
+        return None
+
+    end = None
+    if 'DTEND' in event:
+        end = parse_ics_datetime(*event['DTEND'])
+    elif 'DURATION' in event:
+        duration = parse_ics_duration(event['DURATION'])
+        if duration is not None:
+            end = start + duration
+    if end is None or end < start:
+        end = start
+
+    return {
+        'uid': event.get('UID'),
+        'title': event.get('SUMMARY', ''),
+        'description': event.get('DESCRIPTION', ''),
+        'start': start,
+        'end': end,
+        'duration_hours': (end - start).total_seconds() / 3600
+    }
+
+RRULE_WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+RRULE_FREQUENCIES = {'DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY'}
+
+def parse_rrule(value: str) -> Dict:
+    """
+    Parse an RRULE value into the parts iter_rrule() understands
+
+    BYDAY becomes [(ordinal or None, weekday index)], the other BY* parts
+    lists of ints.
+    """
+    parts = {}
+    for part in value.split(';'):
+        key, _, part_value = part.partition('=')
+        if key:
+            parts[key.strip().upper()] = part_value.strip().upper()
+
+    def numbers(key: str) -> List[int]:
+        return [int(item) for item in parts.get(key, '').split(',') if item.strip().lstrip('+-').isdigit()]
+
+    byday = []
+    for item in parts.get('BYDAY', '').split(','):
+        item = item.strip()
+        if item[-2:] in RRULE_WEEKDAYS:
+            ordinal = item[:-2]
+            byday.append((int(ordinal) if ordinal.lstrip('+-').isdigit() else None, RRULE_WEEKDAYS.index(item[-2:])))
+
+    return {
+        'freq': parts.get('FREQ', ''),
+        'interval': max(1, int(parts['INTERVAL'])) if parts.get('INTERVAL', '').isdigit() else 1,
+        'count': int(parts['COUNT']) if parts.get('COUNT', '').isdigit() else None,
+        'until': parts.get('UNTIL'),
+        'wkst': RRULE_WEEKDAYS.index(parts['WKST']) if parts.get('WKST') in RRULE_WEEKDAYS else 0,
+        'byday': byday,
+        'bymonthday': numbers('BYMONTHDAY'),
+        'bymonth': numbers('BYMONTH'),
+        'bysetpos': numbers('BYSETPOS')
+    }
+
+def _weekdays_in_span(first: date, last: date, byday: List[Tuple[Optional[int], int]]) -> List[date]:
+    """Dates in [first, last] matching BYDAY; ordinals (1MO, -1FR) count within the span"""
+    days = []
+    for ordinal, weekday in byday:
+        offset = (weekday - first.weekday()) % 7
+        matches = [first + timedelta(days=d) for d in range(offset, (last - first).days + 1, 7)]
+        if ordinal is None:
+            days.extend(matches)
+        elif 0 < abs(ordinal) <= len(matches):
+            days.append(matches[ordinal - 1 if ordinal > 0 else ordinal])
+    return days
+
+def _matches_monthday(day: date, bymonthday: List[int]) -> bool:
+    """True if day is one of BYMONTHDAY (negative values count from the month's end)"""
+    return day.day in bymonthday or day.day - calendar.monthrange(day.year, day.month)[1] - 1 in bymonthday
+
+def _month_dates(year: int, month: int, rule: Dict, dtstart: date) -> List[date]:
+    """Candidate days of one month for MONTHLY/YEARLY rules"""
+    month_days = calendar.monthrange(year, month)[1]
+    if rule['byday']:
+        # Ordinals (2MO, -1FR) count within the month, then BYMONTHDAY narrows them down
+        days = _weekdays_in_span(date(year, month, 1), date(year, month, month_days), rule['byday'])
+        if rule['bymonthday']:
+            days = [day for day in days if _matches_monthday(day, rule['bymonthday'])]
+        return days
+    if rule['bymonthday']:
+        days = []
+        for day in rule['bymonthday']:
+            day = day if day > 0 else month_days + day + 1
+            if 1 <= day <= month_days:
+                days.append(date(year, month, day))
+        return days
+    return [date(year, month, dtstart.day)] if dtstart.day <= month_days else []
+
+def _period_start(rule: Dict, anchor: date, period: int) -> date:
+    """First day of the period-th DAILY/WEEKLY/MONTHLY/YEARLY period after anchor"""
+    freq = rule['freq']
+    if freq == 'DAILY':
+        return anchor + timedelta(days=period)
+    if freq == 'WEEKLY':
+        return anchor + timedelta(weeks=period)
+    if freq == 'MONTHLY':
+        year, month = divmod(anchor.year * 12 + anchor.month - 1 + period, 12)
+        return date(year, month + 1, 1)
+    return date(anchor.year + period, 1, 1)
+
+def _periods_between(rule: Dict, anchor: date, target: date) -> int:
+    freq = rule['freq']
+    if freq == 'DAILY':
+        return (target - anchor).days
+    if freq == 'WEEKLY':
+        return (target - anchor).days // 7
+    if freq == 'MONTHLY':
+        return (target.year - anchor.year) * 12 + target.month - anchor.month
+    return target.year - anchor.year
+
+def _period_dates(rule: Dict, period_start: date, dtstart: date) -> List[date]:
+    """Every date the rule produces inside one period, in order"""
+    freq = rule['freq']
+    if freq == 'DAILY':
+        days = [period_start]
+    elif freq == 'WEEKLY':
+        weekdays = {weekday for _, weekday in rule['byday']} or {dtstart.weekday()}
+        # The first week only starts at DTSTART, so BYSETPOS counts from there (as dateutil does)
+        days = [period_start + timedelta(days=i) for i in range(7)]
+        days = [day for day in days if day.weekday() in weekdays and day >= dtstart]
+    elif freq == 'MONTHLY':
+        days = _month_dates(period_start.year, period_start.month, rule, dtstart)
+    elif rule['byday'] and not rule['bymonth']:
+        # YEARLY with BYDAY and no BYMONTH: ordinals count within the year
+        days = _weekdays_in_span(period_start, date(period_start.year, 12, 31), rule['byday'])
+        if rule['bymonthday']:
+            days = [day for day in days if _matches_monthday(day, rule['bymonthday'])]
+    else:
+        months = rule['bymonth'] or (range(1, 13) if rule['bymonthday'] or rule['byday'] else [dtstart.month])
+        days = [day for month in months for day in _month_dates(period_start.year, month, rule, dtstart)]
+
+    if rule['bymonth']:
+        days = [day for day in days if day.month in rule['bymonth']]
+    if freq == 'DAILY' and rule['byday']:
+        days = [day for day in days if day.weekday() in {weekday for _, weekday in rule['byday']}]
+    if freq in ('DAILY', 'WEEKLY') and rule['bymonthday']:
+        days = [day for day in days if _matches_monthday(day, rule['bymonthday'])]
+    days = sorted(set(days))
+    if rule['bysetpos']:
+        days = sorted({days[pos - 1 if pos > 0 else pos] for pos in rule['bysetpos'] if 0 < abs(pos) <= len(days)})
+    return days
+
+def iter_rrule(dtstart: datetime, rule: Dict, until: Optional[datetime], start: datetime, end: datetime) -> Iterator[datetime]:
+    """
+    Lazily generate RRULE occurrences up to end, in DTSTART's wall-clock frame
+
+    Supports FREQ=DAILY/WEEKLY/MONTHLY/YEARLY with INTERVAL, COUNT, UNTIL,
+    BYDAY, BYMONTHDAY, BYMONTH and BYSETPOS. Without COUNT, generation jumps
+    straight to the period containing start, so years of history before the
+    queried window are never visited.
+    """
+    if rule['freq'] not in RRULE_FREQUENCIES:
+        yield dtstart
+        return
+
+    first_day = dtstart.date()
+    anchor = first_day
+    if rule['freq'] == 'WEEKLY':
+        anchor = first_day - timedelta(days=(first_day.weekday() - rule['wkst']) % 7)
+
+    period = 0
+    if rule['count'] is None and start.date() > first_day:
+        period = _periods_between(rule, anchor, start.date()) // rule['interval'] * rule['interval']
+
+    emitted = 0
+    while True:
+        try:
+            period_start = _period_start(rule, anchor, period)
+        except (ValueError, OverflowError):
+            return
+        if period_start > end.date():
+            return
+        for day in _period_dates(rule, period_start, first_day):
+            occurrence = datetime.combine(day, dtstart.time())
+            if occurrence < dtstart:
+                continue
+            if until is not None and occurrence > until:
+                return
+            emitted += 1
+            if rule['count'] is not None and emitted > rule['count']:
+                return
+            yield occurrence
+        period += rule['interval']
+
+def last_counted_occurrence(dtstart_value: List, rule: Dict, horizon: timedelta = timedelta(days=36525)) -> Optional[datetime]:
+    """
+    Local start of a COUNT-bounded rule's final occurrence
+
+    None when the rule does not reach COUNT within horizon of DTSTART (a
+    combination that can never match, or a very long series), in which case
+    callers should treat the series as open-ended. EXDATEs are ignored, so
+    this is an upper bound.
+    """
+    dtstart, zone = resolve_ics_datetime(*dtstart_value)
+    if dtstart is None:
+        return None
+    last, emitted = None, 0
+    for last in iter_rrule(dtstart, rule, None, dtstart, dtstart + horizon):
+        emitted += 1
+    if last is None or (emitted < rule['count'] and rule['freq'] in RRULE_FREQUENCIES):
+        return None
+    return to_local(last, zone)
+
+def expand_recurrence(event: Dict, window_start: datetime, window_end: datetime) -> Iterator[datetime]:
+    """
+    Yield local start times of a series' occurrences in [window_start, window_end)
+
+    Combines DTSTART, RRULE and RDATE, minus EXDATE. Rules are evaluated in
+    the series' own time zone so occurrences keep their wall-clock time
+    across DST changes.
+    """
+    dtstart, zone = resolve_ics_datetime(*event['DTSTART'])
+    if dtstart is None:
+        return
+
+    excluded, excluded_days = set(), set()
+    for value, tzid in event.get('EXDATE', []):
+        moment = parse_ics_datetime(value, tzid)
+        if moment is None:
+            continue
+        if len(value.strip()) == 8:
+            excluded_days.add(moment.date())
+        else:
+            excluded.add(moment)
+
+    streams = [[to_local(dtstart, zone)]]
+    rdates = [parse_ics_datetime(value, tzid) for value, tzid in event.get('RDATE', []) if '/' not in value]
+    streams.append(sorted(moment for moment in rdates if moment is not None))
+
+    if 'RRULE' in event:
+        rule = parse_rrule(event['RRULE'])
+        until = None
+        if rule['until']:
+            until_moment, until_zone = resolve_ics_datetime(rule['until'])
+            if until_moment is not None:
+                if len(rule['until']) == 8:
+                    until = until_moment + timedelta(days=1, microseconds=-1)
+                else:
+                    until = from_local(to_local(until_moment, until_zone), zone)
+        # One day of slack either side covers DST shifts between frames
+        frame_start = from_local(window_start, zone) - timedelta(days=1)
+        frame_end = from_local(window_end, zone) + timedelta(days=1)
+        streams.append(
+            to_local(moment, zone) for moment in iter_rrule(dtstart, rule, until, frame_start, frame_end)
+        )
+
+    previous = None
+    for occurrence in heapq.merge(*streams):
+        if occurrence >= window_end:
+            return
+        if occurrence == previous or occurrence < window_start:
+            continue
+        previous = occurrence
+        if occurrence in excluded or occurrence.date() in excluded_days:
+            continue
+        yield occurrence
+
+class OccurrenceCache:
+    """
+    Expanded occurrence start times per series and window
+
+    Entries are keyed by UID and dropped as soon as the series' SEQUENCE or
+    LAST-MODIFIED changes; the least recently used series are evicted first.
+    """
+
+    def __init__(self, max_series: int = 4096):
+        self.max_series = max_series
+        self.series = OrderedDict()
+
+    def get(self, event: Dict, window_start: datetime, window_end: datetime) -> List[datetime]:
+        uid = event.get('UID')
+        if uid is None:
+            return list(expand_recurrence(event, window_start, window_end))
+
+        version = (event.get('SEQUENCE'), event.get('LAST-MODIFIED'))
+        entry = self.series.get(uid)
+        if entry is None or entry['version'] != version:
+            entry = self.series[uid] = {'version': version, 'windows': {}}
+        self.series.move_to_end(uid)
+
+        key = (window_start, window_end)
+        occurrences = entry['windows'].get(key)
+        if occurrences is None:
+            occurrences = entry['windows'][key] = list(expand_recurrence(event, window_start, window_end))
+        while len(self.series) > self.max_series:
+            self.series.popitem(last=False)
+        return occurrences
+
+    def clear(self):
+        """Forget every series (edits do not always bump SEQUENCE)"""
+        self.series.clear()
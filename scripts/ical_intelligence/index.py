@@ -0,0 +1,332 @@
+"""SQLite interval index over parsed calendar events"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Dict, Iterator, Optional, Tuple
+
+from .ics import event_to_session, iter_vevents, last_counted_occurrence, parse_ics_datetime, parse_rrule
+from .ingest import IngestProgress, resolve_workers, run_sharded
+
+class CalendarIndex:
+    """
+    Incremental on-disk index of VEVENTs parsed from .ics files
+
+    Every file is tracked by (mtime, size, offset, hash of the bytes before
+    offset). Unchanged files are never re-read, files that only grew are
+    resumed from the end of the last parsed VEVENT as long as everything
+    before it is byte-for-byte the same, and anything else is re-parsed from
+    scratch.
+
+    Events double as an interval index: start/end epochs are indexed so range
+    and overlap queries are logarithmic and never touch the .ics files.
+    Recurring series are indexed by the span they are active for and
+    expanded by the caller.
+    """
+
+    SCHEMA_VERSION = 4
+    OPEN_ENDED = 253402300799.0  # 9999-12-31, for series without UNTIL or COUNT
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._db = None
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            # Callers serialise access themselves (`serve` queries from executor threads under a lock)
+            self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._ensure_schema()
+        return self._db
+
+    def _ensure_schema(self):
+        version = self._db.execute('PRAGMA user_version').fetchone()[0]
+        if version == self.SCHEMA_VERSION:
+            return
+        self._db.executescript(f"""
+            DROP TABLE IF EXISTS files;
+            DROP TABLE IF EXISTS events;
+            CREATE TABLE files (
+                path TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                head TEXT NOT NULL
+            );
+            DROP TABLE IF EXISTS meta;
+            CREATE TABLE events (
+                id INTEGER PRIMARY KEY,
+                path TEXT NOT NULL,
+                uid TEXT,
+                series INTEGER NOT NULL,
+                start_ts REAL,
+                end_ts REAL,
+                recurrence_ts REAL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX events_path ON events (path);
+            CREATE INDEX events_start ON events (series, start_ts);
+            CREATE INDEX events_uid ON events (uid);
+            CREATE TABLE meta (
+                key TEXT PRIMARY KEY,
+                value REAL NOT NULL
+            );
+            PRAGMA user_version = {self.SCHEMA_VERSION};
+        """)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    @staticmethod
+    def iter_ics_files(root: Path) -> Iterator[str]:
+        """Walk a calendar directory yielding every .ics path"""
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                if filename.lower().endswith('.ics'):
+                    yield os.path.join(dirpath, filename)
+
+    @classmethod
+    def event_row(cls, path: str, event: Dict) -> Tuple:
+        """
+        Index row for a VEVENT
+
+        One-off events (and moved instances) get their own start/end; a series
+        spans from its first start to UNTIL, its last occurrence (COUNT or
+        RDATE only), or forever.
+        Events that are not coding sessions have no times and never match.
+        """
+        series = ('RRULE' in event or 'RDATE' in event) and 'RECURRENCE-ID' not in event
+        start_ts = end_ts = recurrence_ts = None
+
+        session = event_to_session(event)
+        if session is not None:
+            start_ts, end_ts = session['start'].timestamp(), session['end'].timestamp()
+            length = end_ts - start_ts
+            if series:
+                rule = parse_rrule(event['RRULE']) if 'RRULE' in event else None
+                if rule is None:
+                    last = session['start']
+                elif rule['until']:
+                    last = parse_ics_datetime(rule['until'])
+                    if last is not None and len(rule['until'].strip()) == 8:
+                        last += timedelta(days=1)  # A DATE UNTIL includes that whole day
+                elif rule['count'] is not None:
+                    last = last_counted_occurrence(event['DTSTART'], rule)
+                else:
+                    last = None
+                rdates = [parse_ics_datetime(value, tzid) for value, tzid in event.get('RDATE', []) if '/' not in value]
+                if last is None:
+                    end_ts = cls.OPEN_ENDED
+                else:
+                    end_ts = max([last.timestamp()] + [moment.timestamp() for moment in rdates if moment]) + length
+        if 'RECURRENCE-ID' in event:
+            recurrence = parse_ics_datetime(*event['RECURRENCE-ID'])
+            recurrence_ts = recurrence.timestamp() if recurrence else None
+
+        return (path, event.get('UID'), int(series), start_ts, end_ts, recurrence_ts,
+                json.dumps(event, separators=(',', ':')))
+
+    def _store_rows(self, rows: List[Tuple]):
+        self.db.executemany(
+            'INSERT INTO events (path, uid, series, start_ts, end_ts, recurrence_ts, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)', rows
+        )
+        durations = [end_ts - start_ts for _, _, series, start_ts, end_ts, _, _ in rows
+                     if not series and start_ts is not None]
+        if durations and max(durations) > self.max_duration:
+            self.max_duration = max(durations)
+
+    @property
+    def max_duration(self) -> float:
+        """
+        Upper bound on one-off event length, used to bound overlap queries
+
+        Only ever grows; deleting the longest event leaves a looser but still
+        correct bound.
+        """
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'max_duration'").fetchone()
+        return row[0] if row else 0.0
+
+    @max_duration.setter
+    def max_duration(self, value: float):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('max_duration', ?)", (value,))
+
+    def refresh(self, calendar_path: Path, workers: Optional[int] = None, progress: bool = False) -> Dict:
+        """
+        Bring the index up to date with calendar_path; returns ingest stats
+
+        Changed files are parsed by parse_calendar_file(), in a process pool
+        when there is enough to parse (see ingest.resolve_workers), and the
+        rows are written in path order. progress=True redraws a progress
+        line on stderr while parsing.
+        """
+        db = self.db
+        known = {
+            path: (mtime, size, offset, head)
+            for path, mtime, size, offset, head in db.execute('SELECT path, mtime, size, offset, head FROM files')
+        }
+        stats = {'files': 0, 'skipped': 0, 'resumed': 0, 'parsed': 0, 'removed': 0, 'events': 0,
+                 'bytes': 0, 'workers': 1, 'seconds': 0.0}
+        seen = set()
+        pending = []  # (path, stat, start_offset, head)
+
+        for path in sorted(self.iter_ics_files(calendar_path)):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            seen.add(path)
+            stats['files'] += 1
+
+            previous = known.get(path)
+            if previous and previous[0] == st.st_mtime and previous[1] == st.st_size:
+                stats['skipped'] += 1
+                continue
+
+            # Only a file that grew may be resumed; the worker still checks the head hash
+            if previous and st.st_size > previous[1] and previous[2] > 0:
+                pending.append((path, st, previous[2], previous[3]))
+            else:
+                pending.append((path, st, 0, ''))
+
+        started = time.perf_counter()
+        tasks = [(path, start_offset, head) for path, _, start_offset, head in pending]
+        sizes = [max(st.st_size - start_offset, 0) for _, st, start_offset, _ in pending]
+        stats['bytes'] = sum(sizes)
+        stats['workers'] = resolve_workers(workers, len(tasks), stats['bytes'])
+        reporter = IngestProgress('Calendar', len(tasks), stats['bytes']) if progress else None
+        try:
+            results = run_sharded(parse_calendar_file, tasks, sizes, workers, reporter)
+        finally:
+            if reporter is not None:
+                reporter.close()
+
+        for (path, st, _, _), result in zip(pending, results):
+            if result is None:
+                db.execute('DELETE FROM events WHERE path = ?', (path,))
+                db.execute('DELETE FROM files WHERE path = ?', (path,))
+                continue
+            start_offset, offset, head, rows = result
+            if start_offset:
+                stats['resumed'] += 1
+            else:
+                stats['parsed'] += 1
+                db.execute('DELETE FROM events WHERE path = ?', (path,))
+            self._store_rows(rows)
+            stats['events'] += len(rows)
+            db.execute(
+                'INSERT OR REPLACE INTO files (path, mtime, size, offset, head) VALUES (?, ?, ?, ?, ?)',
+                (path, st.st_mtime, st.st_size, offset, head)
+            )
+        stats['seconds'] = time.perf_counter() - started
+
+        for path in set(known) - seen:
+            db.execute('DELETE FROM events WHERE path = ?', (path,))
+            db.execute('DELETE FROM files WHERE path = ?', (path,))
+            stats['removed'] += 1
+
+        db.commit()
+        return stats
+
+    def iter_events(self) -> Iterator[Dict]:
+        """Yield every indexed VEVENT"""
+        for (data,) in self.db.execute('SELECT data FROM events'):
+            yield json.loads(data)
+
+    def events_between(self, start: datetime, end: datetime, overlapping: bool = False) -> List[Dict]:
+        """
+        One-off events starting in [start, end), or with overlapping=True any
+        event intersecting it
+
+        Both are range scans on the (series, start_ts) index; overlap queries
+        are bounded below by max_duration.
+        """
+        t0, t1 = start.timestamp(), end.timestamp()
+        if overlapping:
+            rows = self.db.execute(
+                'SELECT data FROM events WHERE series = 0 AND start_ts >= ? AND start_ts < ? '
+                'AND (end_ts > ? OR start_ts >= ?) ORDER BY start_ts',
+                (t0 - self.max_duration, t1, t0, t0)
+            )
+        else:
+            rows = self.db.execute(
+                'SELECT data FROM events WHERE series = 0 AND start_ts >= ? AND start_ts < ? ORDER BY start_ts',
+                (t0, t1)
+            )
+        return [json.loads(data) for (data,) in rows]
+
+    def session_times(self, start: datetime, end: datetime) -> List[Tuple[float, float, str, str]]:
+        """
+        (start_ts, end_ts, title, description) of one-off sessions starting in [start, end)
+
+        The same events as events_between(), read from the indexed times with
+        the text pulled out by json_extract(), so bulk queries skip decoding
+        and re-parsing every VEVENT in Python.
+        """
+        return self.db.execute(
+            "SELECT start_ts, end_ts, COALESCE(json_extract(data, '$.SUMMARY'), ''), "
+            "COALESCE(json_extract(data, '$.DESCRIPTION'), '') "
+            'FROM events WHERE series = 0 AND start_ts >= ? AND start_ts < ? ORDER BY start_ts',
+            (start.timestamp(), end.timestamp())
+        ).fetchall()
+
+    def series_between(self, start: datetime, end: datetime) -> List[Dict]:
+        """Recurring series whose active span intersects [start, end)"""
+        rows = self.db.execute(
+            'SELECT data FROM events WHERE series = 1 AND start_ts < ? AND end_ts > ?',
+            (end.timestamp(), start.timestamp())
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    def overridden_instances(self, uid: str) -> set:
+        """Original start times (local) of a series' moved or edited instances"""
+        rows = self.db.execute(
+            'SELECT recurrence_ts FROM events WHERE uid = ? AND recurrence_ts IS NOT NULL', (uid,)
+        )
+        return {datetime.fromtimestamp(recurrence_ts) for (recurrence_ts,) in rows}
+
+def hash_head(f, length: int, digest=None):
+    """Hash object over the next `length` bytes of f (continuing `digest` if given)"""
+    digest = digest or hashlib.blake2b(digest_size=16)
+    while length > 0:
+        chunk = f.read(min(length, 1 << 20))
+        if not chunk:
+            break
+        digest.update(chunk)
+        length -= len(chunk)
+    return digest
+
+def parse_calendar_file(task: Tuple[str, int, str]) -> Optional[Tuple[int, int, str, List[Tuple]]]:
+    """
+    (start_offset, new_offset, head hash, index rows) for one file
+
+    task is (path, offset to resume from, hash of the bytes before it). The
+    resume offset is only honoured when those bytes still hash the same;
+    otherwise the file is parsed from 0 and start_offset says so. Runs in
+    ingestion workers, so it only reads; None if the file vanished.
+    """
+    path, start_offset, expected = task
+    try:
+        with open(path, 'rb') as f:
+            digest = hash_head(f, start_offset) if start_offset else None
+            if digest is None or f.tell() != start_offset or digest.hexdigest() != expected:
+                start_offset, digest = 0, None
+
+            offset = start_offset
+            rows = []
+            for event, end_offset in iter_vevents(Path(path), start_offset):
+                rows.append(CalendarIndex.event_row(path, event))
+                offset = end_offset
+
+            f.seek(start_offset)
+            digest = hash_head(f, offset - start_offset, digest)
+    except OSError:
+        return None
+    return start_offset, offset, digest.hexdigest(), rows
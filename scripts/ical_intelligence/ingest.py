@@ -0,0 +1,120 @@
+"""
+Process-pool ingestion shared by the calendar index and the usage aggregator
+
+Work is sharded by file. Tasks are packed into byte-balanced shards, each
+worker process runs a module-level function over its shard and sends back
+compact per-file results (index rows, usage buckets), and callers merge
+them in task order, so the outcome never depends on which worker finished
+first.
+"""
+
+import os
+import sys
+import time
+import heapq
+import threading
+from typing import Callable, List, Optional, Sequence
+
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024  # Below this, starting a pool costs more than it saves
+SHARDS_PER_WORKER = 4  # Several shards per worker evens out stragglers
+
+def resolve_workers(workers: Optional[int], task_count: int, total_bytes: int) -> int:
+    """The requested worker count, or with None one per CPU once there is enough to parse"""
+    if workers is None:
+        if total_bytes < PARALLEL_MIN_BYTES:
+            return 1
+        workers = os.cpu_count() or 1
+    return max(1, min(workers, task_count))
+
+def balance_shards(sizes: Sequence[int], count: int) -> List[List[int]]:
+    """Task indexes split into at most `count` shards of similar total size, largest tasks first"""
+    loads = [(0, shard) for shard in range(count)]
+    shards = [[] for _ in range(count)]
+    for index in sorted(range(len(sizes)), key=lambda i: -sizes[i]):
+        load, shard = heapq.heappop(loads)
+        shards[shard].append(index)
+        heapq.heappush(loads, (load + sizes[index], shard))
+    return [sorted(shard) for shard in shards if shard]
+
+def pool_context():
+    """
+    multiprocessing context for the worker pool
+
+    The platform default unless other threads are running (e.g. ingestion
+    from the daemon's executor threads): forking a multi-threaded process can
+    deadlock the child, so then workers come from a fork server, or are
+    spawned where there is none.
+    """
+    if threading.active_count() == 1:
+        return None
+    import multiprocessing
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+def run_shard(worker: Callable, tasks: List) -> List:
+    return [worker(task) for task in tasks]
+
+class IngestProgress:
+    """Files and bytes done with throughput, redrawn in place when stderr is a terminal"""
+
+    REDRAW_SECONDS = 0.1
+
+    def __init__(self, label: str, total_files: int, total_bytes: int):
+        self.label = label
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.files = 0
+        self.bytes = 0
+        self.started = time.perf_counter()
+        self.drawn = 0.0
+        self.enabled = sys.stderr.isatty()
+
+    def advance(self, files: int, nbytes: int):
+        self.files += files
+        self.bytes += nbytes
+        now = time.perf_counter()
+        if self.enabled and (now - self.drawn >= self.REDRAW_SECONDS or self.files == self.total_files):
+            self.drawn = now
+            rate = self.bytes / max(now - self.started, 1e-9) / 1e6
+            sys.stderr.write(f"\r   {self.label}: {self.files:,}/{self.total_files:,} files, "
+                             f"{self.bytes / 1e6:,.1f}/{self.total_bytes / 1e6:,.1f} MB ({rate:,.1f} MB/s)  ")
+            sys.stderr.flush()
+
+    def close(self):
+        if self.enabled and self.drawn:
+            sys.stderr.write('\r\033[K')
+            sys.stderr.flush()
+
+def run_sharded(worker: Callable, tasks: Sequence, sizes: Sequence[int], workers: Optional[int] = None,
+                progress: Optional[IngestProgress] = None) -> List:
+    """
+    [worker(task) for task in tasks], spread over a process pool when worth it
+
+    worker must be a module-level function (it is pickled by reference).
+    Results come back in task order; resolve_workers() with the same
+    arguments tells how many processes were used.
+    """
+    count = resolve_workers(workers, len(tasks), sum(sizes))
+    if count <= 1:
+        results = []
+        for task, size in zip(tasks, sizes):
+            results.append(worker(task))
+            if progress is not None:
+                progress.advance(1, size)
+        return results
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    results = [None] * len(tasks)
+    with ProcessPoolExecutor(max_workers=count, mp_context=pool_context()) as pool:
+        futures = {
+            pool.submit(run_shard, worker, [tasks[index] for index in shard]): shard
+            for shard in balance_shards(sizes, count * SHARDS_PER_WORKER)
+        }
+        for future in as_completed(futures):
+            shard = futures[future]
+            for index, result in zip(shard, future.result()):
+                results[index] = result
+            if progress is not None:
+                progress.advance(len(shard), sum(sizes[index] for index in shard))
+    return results
@@ -0,0 +1,92 @@
+"""#tag and keyword extraction from calendar event text"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Optional
+
+# Keywords used to infer complexity when no #complexity tag is given; any
+# 'low' keyword wins over 'high' ones
+COMPLEXITY_KEYWORDS = {
+    'simple': 'low', 'fix': 'low', 'tweak': 'low', 'update': 'low',
+    'complex': 'high', 'architecture': 'high', 'design': 'high', 'critical': 'high'
+}
+
+# Session tags: name -> (value pattern, metadata key, converter)
+SESSION_TAGS = {}
+_session_pattern = None
+
+def parse_token_count(value: str) -> int:
+    """'45k' -> 45000, '2m' -> 2000000"""
+    multiplier = {'k': 1000, 'm': 1000000}.get(value[-1], 1)
+    return int(value.rstrip('km')) * multiplier
+
+def register_session_tag(name: str, pattern: str, key: Optional[str] = None, convert=None):
+    """
+    Make parse_session_metadata() understand #name:value
+
+    pattern matches the (lowercased) value and must not contain capturing
+    groups. All tags share one compiled pattern, so extra tags add no passes.
+    """
+    global _session_pattern
+    SESSION_TAGS[name] = (pattern, key or name, convert)
+    _session_pattern = None
+    parse_session_text.cache_clear()
+
+def get_session_pattern() -> re.Pattern:
+    """Compile every tag and complexity keyword into a single pattern"""
+    global _session_pattern
+    if _session_pattern is None:
+        tags = '|'.join(f'{name}:(?P<{name}>{pattern})' for name, (pattern, _, _) in SESSION_TAGS.items())
+        keywords = '|'.join(map(re.escape, sorted(COMPLEXITY_KEYWORDS, key=len, reverse=True)))
+        # The leading lookahead lets the regex engine skip straight to candidate characters
+        first_chars = re.escape(''.join(sorted({'#', *(word[0] for word in COMPLEXITY_KEYWORDS)})))
+        _session_pattern = re.compile(f'(?=[{first_chars}])(?:#(?:{tags})|(?P<keyword>{keywords}))')
+    return _session_pattern
+
+@lru_cache(maxsize=8192)
+def parse_session_text(event_title: str, description: str = '') -> Dict:
+    """
+    Single-pass tag and keyword extraction behind parse_session_metadata()
+
+    Memoised on (title, description) since recurring events repeat the same
+    text; callers must not mutate the returned dict.
+    """
+    text = f"{event_title} {description}".lower()
+    search = get_session_pattern().search
+    values = {}
+    levels = set()
+
+    position = 0
+    match = search(text)
+    while match:
+        name = match.lastgroup
+        if name == 'keyword':
+            levels.add(COMPLEXITY_KEYWORDS[match.group(name)])
+            position = match.end()
+        else:
+            values.setdefault(name, match.group(name))
+            # Keep scanning inside the value: '#project:bugfix' still says 'fix'
+            position = match.start(name)
+        match = search(text, position)
+
+    if 'complexity' in values:
+        complexity = values.pop('complexity')
+    elif 'low' in levels:
+        complexity = 'low'
+    elif 'high' in levels:
+        complexity = 'high'
+    else:
+        complexity = 'medium'
+
+    metadata = {'complexity': complexity}
+    for name, value in values.items():
+        _, key, convert = SESSION_TAGS[name]
+        metadata[key] = convert(value) if convert else value
+    return metadata
+
+register_session_tag('complexity', r'low|medium|high|critical')
+register_session_tag('project', r'\S+')
+register_session_tag('tokens', r'\d+[km]?', 'explicit_tokens', parse_token_count)
+register_session_tag('agents', r'[a-z,]+', 'suggested_agents', lambda value: value.split(','))
+register_session_tag('model', r'opus|sonnet|haiku')
+register_session_tag('priority', r'\S+')
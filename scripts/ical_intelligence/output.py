@@ -0,0 +1,16 @@
+"""Terminal output helpers"""
+
+# ANSI colors for terminal output
+class Colors:
+    RESET = '\033[0m'
+    BOLD = '\033[1m'
+    CYAN = '\033[36m'
+    GREEN = '\033[32m'
+    YELLOW = '\033[33m'
+    RED = '\033[31m'
+    BLUE = '\033[34m'
+    MAGENTA = '\033[35m'
+
+def log(message: str, color: str = 'RESET'):
+    """Print colored log message"""
+    print(f"{getattr(Colors, color.upper(), Colors.RESET)}{message}{Colors.RESET}")
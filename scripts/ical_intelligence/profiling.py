@@ -0,0 +1,105 @@
+"""
+Per-stage timings for `--profile`
+
+Coarse stages (calendar.index, usage.refresh, ...) are `with` blocks in the
+bridge; a disabled profiler hands out one shared no-op context, so they cost
+nothing measurable in normal runs. Per-call hot paths (metadata parsing,
+prediction, cost) are not touched at all unless profiling: instrument()
+swaps timed wrappers onto the bridge instance instead.
+"""
+
+import sys
+import json
+import time
+from typing import Dict, List, Optional
+
+class _NoStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_STAGE = _NoStage()
+
+class _Stage:
+    __slots__ = ('totals', 'name', 'started')
+
+    def __init__(self, totals: Dict[str, List], name: str):
+        self.totals = totals
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        entry = self.totals.setdefault(self.name, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] = max(entry[2], elapsed)
+        return False
+
+class StageProfiler:
+    """Wall time per named stage, accumulated over every call"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.totals = {}  # name -> [calls, seconds, slowest call]
+        self.started = time.perf_counter()
+
+    def stage(self, name: str):
+        return _Stage(self.totals, name) if self.enabled else _NO_STAGE
+
+    def instrument(self, target, *methods: str):
+        """Time each call to target.<method> as a stage of the same name"""
+        if not self.enabled:
+            return
+        for name in methods:
+            method = getattr(target, name)
+
+            def timed(*args, _method=method, _name=name, **kwargs):
+                with _Stage(self.totals, _name):
+                    return _method(*args, **kwargs)
+
+            setattr(target, name, timed)
+
+    def results(self) -> Dict:
+        """Stages in the order they first ran, plus the whole run and the time outside any stage"""
+        total = time.perf_counter() - self.started
+        stages = {
+            name: {
+                'calls': calls,
+                'total_ms': round(seconds * 1000, 3),
+                'mean_us': round(seconds / calls * 1e6, 2),
+                'max_us': round(slowest * 1e6, 2)
+            }
+            for name, (calls, seconds, slowest) in self.totals.items()
+        }
+        staged = sum(seconds for _, seconds, _ in self.totals.values())
+        return {
+            'command': sys.argv[1:],
+            'total_ms': round(total * 1000, 3),
+            'unstaged_ms': round(max(total - staged, 0.0) * 1000, 3),
+            'stages': stages
+        }
+
+    def report(self, path: Optional[str] = None):
+        """Print the stage table to stderr (stdout stays clean for `status`); with path, also write JSON"""
+        results = self.results()
+        total = results['total_ms'] or 1e-9
+        rows = [(name, stage['calls'], stage['total_ms'], stage['mean_us']) for name, stage in results['stages'].items()]
+        rows.append(('(outside stages)', None, results['unstaged_ms'], None))
+
+        out = sys.stderr
+        out.write(f"\n⏱️  Profile: {' '.join(results['command']) or 'today'} in {results['total_ms']:,.1f} ms\n")
+        out.write(f"   {'stage':<24} {'calls':>7} {'total':>11} {'share':>6} {'per call':>11}\n")
+        for name, calls, total_ms, mean_us in sorted(rows, key=lambda row: -row[2]):
+            per_call = f"{mean_us:>9,.1f}µs" if mean_us is not None else ''
+            out.write(f"   {name:<24} {calls if calls is not None else '':>7} {total_ms:>9,.2f}ms "
+                      f"{total_ms / total * 100:>5.1f}% {per_call:>11}\n")
+        if path:
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2)
+            out.write(f"   Saved to {path}\n")
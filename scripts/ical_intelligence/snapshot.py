@@ -0,0 +1,181 @@
+"""
+Binary status snapshot for the fast `status` path
+
+After every live aggregation the bridge stores the budget status as packed
+integers plus pre-escaped strings. `status` renders it straight back out
+without importing the bridge or parsing any JSON, as long as no JSONL log
+(or quota-tracker.json) changed and nothing in it has expired since.
+The read side deliberately imports only os, time and struct (not even
+typing; annotations are left unevaluated).
+"""
+
+from __future__ import annotations
+
+import os
+import time
+import struct
+
+MAGIC = b'ICTS'
+VERSION = 1
+HEADER = struct.Struct('<4sHxxqqqqq')  # magic, version, valid_until, count, size, newest mtime, quota mtime
+TOTALS = struct.Struct('<qqqqq')  # weekly, daily, limit, remaining, used
+COUNT = struct.Struct('<H')
+ENTRY = struct.Struct('<Hq')
+
+def claude_dir() -> str:
+    return os.path.join(os.path.expanduser('~'), '.claude')
+
+def usage_signature(projects_path: str, quota_path: str) -> tuple[int, int, int, int]:
+    """
+    (file count, total size, newest mtime_ns, quota-tracker mtime_ns)
+
+    Covers the same <project>/*.jsonl files as UsageAggregator, so any append,
+    new file or removal changes it.
+    """
+    count = size = newest = 0
+    try:
+        project_dirs = list(os.scandir(projects_path))
+    except OSError:
+        project_dirs = []
+    for project_dir in project_dirs:
+        if not project_dir.is_dir():
+            continue
+        try:
+            entries = list(os.scandir(project_dir.path))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name.endswith('.jsonl') and entry.is_file():
+                st = entry.stat()
+                count += 1
+                size += st.st_size
+                newest = max(newest, st.st_mtime_ns)
+    try:
+        quota = os.stat(quota_path).st_mtime_ns
+    except OSError:
+        quota = 0
+    return count, size, newest, quota
+
+def _pack_text(text: str) -> bytes:
+    data = text.encode('ascii')
+    return COUNT.pack(len(data)) + data
+
+def _pack_models(by_model: dict[str, int]) -> bytes:
+    import json
+    parts = [COUNT.pack(len(by_model))]
+    for model, tokens in by_model.items():
+        name = json.dumps(model).encode('ascii')
+        parts.append(ENTRY.pack(len(name), tokens) + name)
+    return b''.join(parts)
+
+def write_status_snapshot(path: str, status: dict, signature: tuple[int, int, int, int],
+                          now: float | None = None):
+    """
+    Store a status() result, valid until the next local midnight or until the
+    oldest tokens in the five-hour window expire, whichever comes first
+    """
+    from datetime import datetime
+    today = time.localtime(time.time() if now is None else now)
+    valid_until = time.mktime((today.tm_year, today.tm_mon, today.tm_mday + 1, 0, 0, 0, 0, 0, -1))
+    five_hour = status['fiveHourWindow']
+    reset_time = five_hour.get('resetTime')
+    if reset_time:
+        valid_until = min(valid_until, datetime.fromisoformat(reset_time.replace('Z', '+00:00')).timestamp())
+
+    payload = b''.join([
+        HEADER.pack(MAGIC, VERSION, int(valid_until), *signature),
+        TOTALS.pack(status['weekly']['total'], status['daily']['total'],
+                    five_hour['limit'], five_hour['remaining'], five_hour['used']),
+        _pack_text(status['weekStart']),
+        _pack_text(status['todayStart']),
+        _pack_text(reset_time or ''),
+        _pack_models(status['weekly']['byModel']),
+        _pack_models(status['daily']['byModel']),
+        _pack_models(five_hour['byModel'])
+    ])
+    tmp_path = f'{path}.{os.getpid()}.tmp'  # Per process: parallel hooks write at the same time
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+def _render_models(by_model: list[tuple[str, int]], indent: str) -> str:
+    if not by_model:
+        return '{}'
+    rows = ',\n'.join(f'{indent}  {name}: {tokens}' for name, tokens in by_model)
+    return '{\n' + rows + '\n' + indent + '}'
+
+def read_status_snapshot(path: str, signature: tuple[int, int, int, int],
+                         now: float | None = None) -> str | None:
+    """
+    The snapshot rendered exactly as `json.dumps(status, indent=2)`, or None
+    if it is missing, stale or from another version
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, valid_until, *stored = HEADER.unpack_from(data)
+    except (OSError, struct.error):
+        return None
+    now = time.time() if now is None else now
+    if magic != MAGIC or version != VERSION or now >= valid_until or tuple(stored) != signature:
+        return None
+
+    offset = HEADER.size
+    weekly, daily, limit, remaining, used = TOTALS.unpack_from(data, offset)
+    offset += TOTALS.size
+    texts = []
+    for _ in range(3):
+        (length,) = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        texts.append(data[offset:offset + length].decode('ascii'))
+        offset += length
+    tables = []
+    for _ in range(3):
+        (count,) = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        table = []
+        for _ in range(count):
+            length, tokens = ENTRY.unpack_from(data, offset)
+            offset += ENTRY.size
+            table.append((data[offset:offset + length].decode('ascii'), tokens))
+            offset += length
+        tables.append(table)
+
+    week_start, today_start, reset_time = texts
+    updated = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(now)) + f'.{int(now * 1000) % 1000:03d}Z'
+    five_hour = (f'    "limit": {limit},\n    "remaining": {remaining},\n    "used": {used},\n'
+                 f'    "byModel": {_render_models(tables[2], "    ")}')
+    if reset_time:
+        five_hour += f',\n    "resetTime": "{reset_time}"'
+    return (
+        '{\n'
+        f'  "lastUpdated": "{updated}",\n'
+        f'  "weekStart": "{week_start}",\n'
+        f'  "todayStart": "{today_start}",\n'
+        '  "weekly": {\n'
+        f'    "total": {weekly},\n'
+        f'    "byModel": {_render_models(tables[0], "    ")},\n'
+        '    "limits": {}\n'
+        '  },\n'
+        '  "daily": {\n'
+        f'    "total": {daily},\n'
+        f'    "byModel": {_render_models(tables[1], "    ")}\n'
+        '  },\n'
+        '  "fiveHourWindow": {\n'
+        f'{five_hour}\n'
+        '  }\n'
+        '}\n'
+    )
+
+def cached_status() -> str | None:
+    """`status` output from the snapshot in ~/.claude, or None to fall back to a live run"""
+    base = claude_dir()
+    signature = usage_signature(os.path.join(base, 'projects'), os.path.join(base, 'quota-tracker.json'))
+    return read_status_snapshot(os.path.join(base, 'ical-status.snapshot'), signature)
@@ -0,0 +1,330 @@
+"""Incremental token usage aggregation from Claude Code JSONL logs"""
+
+import os
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Optional, Iterator, Tuple
+
+from .ingest import IngestProgress, resolve_workers, run_sharded
+from .window import TokenWindow, minute_of
+
+def get_week_start(now: datetime) -> datetime:
+    """Start of the current week (Monday 00:00 local), as in update-token-tracker.js"""
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=today.weekday())
+
+def scan_usage_file(path: str, start_offset: int, day_floor: str, minute_floor: int,
+                    hour_floor: int) -> Tuple[int, Dict, Dict, Dict]:
+    """
+    Tail a Claude Code JSONL transcript from start_offset
+
+    Only complete lines are consumed, so a line still being written is picked
+    up on the next run. Returns (new_offset, days, minutes, hours) where days
+    maps a local 'YYYY-MM-DD' and minutes an epoch minute (as str) to
+    {model: tokens}, and hours an epoch hour (as str) to total tokens.
+    Usage older than the matching floor is not bucketed.
+    """
+    days = {}
+    minutes = {}
+    hours = {}
+    offset = start_offset
+
+    with open(path, 'rb') as f:
+        f.seek(start_offset)
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            offset += len(line)
+            # Cheap pre-filter: most transcript lines carry no usage at all
+            if b'"usage"' not in line:
+                continue
+
+            try:
+                entry = json.loads(line)
+                message = entry['message']
+                if entry.get('type') != 'assistant' or not message.get('usage'):
+                    continue
+                usage = message['usage']
+                tokens = usage.get('input_tokens', 0) + usage.get('output_tokens', 0)
+                epoch = datetime.fromisoformat(entry['timestamp'].replace('Z', '+00:00')).timestamp()
+            except (ValueError, KeyError, TypeError, AttributeError):
+                # Skip malformed JSON lines
+                continue
+
+            model = message.get('model') or 'unknown'
+            day = datetime.fromtimestamp(epoch).strftime('%Y-%m-%d')
+            if day >= day_floor:
+                bucket = days.setdefault(day, {})
+                bucket[model] = bucket.get(model, 0) + tokens
+            minute = int(epoch // 60)
+            if minute >= minute_floor:
+                bucket = minutes.setdefault(str(minute), {})
+                bucket[model] = bucket.get(model, 0) + tokens
+            hour = int(epoch // 3600)
+            if hour >= hour_floor:
+                hours[str(hour)] = hours.get(str(hour), 0) + tokens
+
+    return offset, days, minutes, hours
+
+def scan_usage_task(task: Tuple[str, int, str, int, int]) -> Optional[Tuple[int, Dict, Dict, Dict]]:
+    """scan_usage_file() for ingestion workers; None if the file vanished"""
+    try:
+        return scan_usage_file(*task)
+    except OSError:
+        return None
+
+def merge_usage_buckets(target: Dict, source: Dict):
+    """Add {bucket: {model: tokens}} counts from source into target"""
+    for key, models in source.items():
+        bucket = target.setdefault(key, {})
+        for model, tokens in models.items():
+            bucket[model] = bucket.get(model, 0) + tokens
+
+class UsageAggregator:
+    """
+    Incremental token usage aggregation over Claude Code JSONL transcripts
+
+    Each transcript is tailed from the byte offset stored in a checkpoint.
+    Partial aggregates are kept per file, so a truncated or rotated file is
+    dropped and re-read from the start without double counting.
+    """
+
+    CHECKPOINT_VERSION = 2
+    WINDOW_SECONDS = 5 * 3600
+    HISTORY_DAYS = 90  # Hourly history kept for calibration
+    FINGERPRINT_BYTES = 64
+
+    def __init__(self, projects_path: Path, checkpoint_path: Path):
+        self.projects_path = projects_path
+        self.checkpoint_path = checkpoint_path
+        self.files = {}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        """Load the offset checkpoint, discarding it if the format changed"""
+        try:
+            checkpoint = json.loads(self.checkpoint_path.read_text())
+        except (OSError, ValueError):
+            return
+        if checkpoint.get('version') == self.CHECKPOINT_VERSION:
+            self.files = checkpoint.get('files', {})
+
+    def save(self):
+        """
+        Atomically write the checkpoint if anything changed
+
+        Concurrent runs (parallel hook calls) each write their own temp file,
+        and the last rename wins. The checkpoint is only a cache, so a failed
+        write is ignored and simply retried by the next run.
+        """
+        if not self.dirty:
+            return
+        tmp_path = self.checkpoint_path.with_name(f'{self.checkpoint_path.name}.{os.getpid()}.tmp')
+        try:
+            self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(
+                {'version': self.CHECKPOINT_VERSION, 'files': self.files},
+                separators=(',', ':')
+            ))
+            os.replace(tmp_path, self.checkpoint_path)
+        except OSError:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            return
+        self.dirty = False
+
+    def iter_jsonl_files(self) -> Iterator[str]:
+        """Every <project>/*.jsonl file, matching update-token-tracker.js"""
+        try:
+            project_dirs = list(os.scandir(self.projects_path))
+        except OSError:
+            return
+        for project_dir in project_dirs:
+            if not project_dir.is_dir():
+                continue
+            try:
+                entries = list(os.scandir(project_dir.path))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name.endswith('.jsonl') and entry.is_file():
+                    yield entry.path
+
+    def _fingerprint(self, path: str) -> str:
+        with open(path, 'rb') as f:
+            return f.read(self.FINGERPRINT_BYTES).hex()
+
+    def _is_same_file(self, path: str, state: Dict, st: os.stat_result) -> bool:
+        """False if the file was truncated or replaced since it was checkpointed"""
+        if state['inode'] != st.st_ino or st.st_size < state['offset']:
+            return False
+        if state['offset'] == 0:
+            return True
+        return self._fingerprint(path) == state['fingerprint']
+
+    def refresh(self, now: Optional[datetime] = None, workers: Optional[int] = None,
+                progress: bool = False) -> Dict:
+        """
+        Read new usage from every transcript; returns scan stats
+
+        Files with new data are tailed by scan_usage_task(), in a process
+        pool when there is enough to read (see ingest.resolve_workers), and
+        their buckets merged in path order. progress=True redraws a
+        progress line on stderr while scanning.
+        """
+        now = now or datetime.now()
+        day_floor = get_week_start(now).strftime('%Y-%m-%d')
+        minute_floor = int(now.timestamp() - self.WINDOW_SECONDS) // 60
+        hour_floor = int(now.timestamp()) // 3600 - self.HISTORY_DAYS * 24
+        stats = {'files': 0, 'unchanged': 0, 'tailed': 0, 'reset': 0, 'removed': 0, 'bytes': 0,
+                 'workers': 1, 'seconds': 0.0}
+        seen = set()
+        pending = []  # (path, stat, state)
+
+        for path in sorted(self.iter_jsonl_files()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            seen.add(path)
+            stats['files'] += 1
+
+            state = self.files.get(path)
+            if state and state['size'] == st.st_size and state['mtime'] == st.st_mtime \
+                    and state['inode'] == st.st_ino:
+                stats['unchanged'] += 1
+                continue
+
+            try:
+                if state and not self._is_same_file(path, state, st):
+                    stats['reset'] += 1
+                    state = None
+            except OSError:
+                continue
+            if state is None:
+                state = {'offset': 0, 'days': {}, 'minutes': {}, 'hours': {}, 'fingerprint': ''}
+            pending.append((path, st, state))
+
+        started = time.perf_counter()
+        tasks = [(path, state['offset'], day_floor, minute_floor, hour_floor) for path, _, state in pending]
+        sizes = [max(st.st_size - state['offset'], 0) for _, st, state in pending]
+        stats['workers'] = resolve_workers(workers, len(tasks), sum(sizes))
+        reporter = IngestProgress('Usage logs', len(tasks), sum(sizes)) if progress else None
+        try:
+            results = run_sharded(scan_usage_task, tasks, sizes, workers, reporter)
+        finally:
+            if reporter is not None:
+                reporter.close()
+
+        for (path, st, state), result in zip(pending, results):
+            if result is None:
+                continue
+            offset, days, minutes, hours = result
+            if not state['fingerprint'] and offset > 0:
+                try:
+                    state['fingerprint'] = self._fingerprint(path)
+                except OSError:
+                    continue
+
+            stats['tailed'] += 1
+            stats['bytes'] += offset - state['offset']
+            merge_usage_buckets(state['days'], days)
+            merge_usage_buckets(state['minutes'], minutes)
+            for hour, tokens in hours.items():
+                state['hours'][hour] = state['hours'].get(hour, 0) + tokens
+            state.update(offset=offset, size=st.st_size, mtime=st.st_mtime, inode=st.st_ino)
+            self.files[path] = state
+            self.dirty = True
+        stats['seconds'] = time.perf_counter() - started
+
+        for path in set(self.files) - seen:
+            del self.files[path]
+            stats['removed'] += 1
+            self.dirty = True
+
+        self.prune(day_floor, minute_floor, hour_floor)
+        self.save()
+        return stats
+
+    def prune(self, day_floor: str, minute_floor: int, hour_floor: int):
+        """Drop buckets outside the weekly, 5-hour and calibration windows"""
+        for state in self.files.values():
+            for day in [day for day in state['days'] if day < day_floor]:
+                del state['days'][day]
+                self.dirty = True
+            for minute in [minute for minute in state['minutes'] if int(minute) < minute_floor]:
+                del state['minutes'][minute]
+                self.dirty = True
+            for hour in [hour for hour in state['hours'] if int(hour) < hour_floor]:
+                del state['hours'][hour]
+                self.dirty = True
+
+    def hourly_usage(self) -> Dict[str, Dict[str, int]]:
+        """Checkpointed hourly token totals, keyed by project directory name"""
+        usage = {}
+        for path, state in self.files.items():
+            project = usage.setdefault(Path(path).parent.name, {})
+            for hour, tokens in state['hours'].items():
+                project[hour] = project.get(hour, 0) + tokens
+        return usage
+
+    def build_window(self, limit: int = 200000, now: Optional[datetime] = None) -> TokenWindow:
+        """Load the checkpointed minute buckets into a TokenWindow ending now"""
+        window = TokenWindow(limit, self.WINDOW_SECONDS // 60)
+        minutes = {}
+        for state in self.files.values():
+            merge_usage_buckets(minutes, state['minutes'])
+        for minute in sorted(minutes, key=int):
+            for model, tokens in minutes[minute].items():
+                window.add(int(minute), model, tokens)
+        window.advance(minute_of(now or datetime.now()))
+        return window
+
+    def status(self, limit: int = 200000, now: Optional[datetime] = None) -> Dict:
+        """Budget status in the token-tracker.json format"""
+        now = now or datetime.now()
+        week_start = get_week_start(now)
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        week_floor = week_start.strftime('%Y-%m-%d')
+        today = today_start.strftime('%Y-%m-%d')
+
+        weekly, daily = {}, {}
+        for state in self.files.values():
+            for day, models in state['days'].items():
+                if day < week_floor:
+                    continue
+                for model, tokens in models.items():
+                    weekly[model] = weekly.get(model, 0) + tokens
+                    if day == today:
+                        daily[model] = daily.get(model, 0) + tokens
+        window = self.build_window(limit, now)
+
+        def by_usage(usage: Dict) -> Dict:
+            return dict(sorted(usage.items(), key=lambda item: item[1], reverse=True))
+
+        def iso(moment: datetime) -> str:
+            return moment.astimezone(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+        five_hour = {
+            'limit': limit,
+            'remaining': window.remaining(),
+            'used': window.used(),
+            'byModel': by_usage({model: tokens for model, tokens in window.by_model.items() if tokens})
+        }
+        reset_minute = window.reset_minute()
+        if reset_minute is not None:
+            five_hour['resetTime'] = iso(datetime.fromtimestamp(reset_minute * 60))
+
+        return {
+            'lastUpdated': iso(now),
+            'weekStart': iso(week_start),
+            'todayStart': iso(today_start),
+            'weekly': {'total': sum(weekly.values()), 'byModel': by_usage(weekly), 'limits': {}},
+            'daily': {'total': sum(daily.values()), 'byModel': by_usage(daily)},
+            'fiveHourWindow': five_hour
+        }
@@ -0,0 +1,144 @@
+"""
+Directory watching for the `serve` daemon
+
+InotifyWatcher uses Linux inotify through ctypes and plugs its descriptor
+into the asyncio loop; PollingWatcher re-stats the trees on an interval, on
+executor threads so large trees never stall the loop, and is used everywhere
+else (or when forced). Both call on_change(label) with
+the label of the root that changed; callers re-read incrementally, so a
+change is only a hint, never a payload.
+"""
+
+import os
+import struct
+import asyncio
+from typing import Callable, Dict, Tuple
+
+class PollingWatcher:
+    """Detect changes by comparing (file count, total size, newest mtime) per root"""
+
+    def __init__(self, roots: Dict[str, str], on_change: Callable[[str], None], interval: float = 2.0):
+        self.roots = roots
+        self.on_change = on_change
+        self.interval = interval
+        self.signatures = {}
+        self.task = None
+
+    @staticmethod
+    def signature(root: str) -> Tuple[int, int, int]:
+        count = size = newest = 0
+        for directory, _, names in os.walk(root):
+            for name in names:
+                try:
+                    st = os.stat(os.path.join(directory, name))
+                except OSError:
+                    continue
+                count += 1
+                size += st.st_size
+                newest = max(newest, st.st_mtime_ns)
+        return count, size, newest
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        self.task = loop.create_task(self.run())
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for label, path in self.roots.items():
+            self.signatures[label] = await loop.run_in_executor(None, self.signature, path)
+        while True:
+            await asyncio.sleep(self.interval)
+            for label, path in self.roots.items():
+                signature = await loop.run_in_executor(None, self.signature, path)
+                if signature != self.signatures[label]:
+                    self.signatures[label] = signature
+                    self.on_change(label)
+
+    def close(self):
+        if self.task is not None:
+            self.task.cancel()
+
+class InotifyWatcher:
+    """Recursive inotify watches; new subdirectories are picked up as they appear"""
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+    def __init__(self, roots: Dict[str, str], on_change: Callable[[str], None]):
+        import ctypes
+        import ctypes.util
+
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.roots = roots
+        self.on_change = on_change
+        self.fd = self.libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.watches = {}  # wd -> (label, directory)
+        self.loop = None
+        for label, path in roots.items():
+            self.watch_tree(label, path)
+
+    def watch_tree(self, label: str, root: str):
+        for directory, _, _ in os.walk(root):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+            if wd >= 0:
+                self.watches[wd] = (label, directory)
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        loop.add_reader(self.fd, self.read_events)
+
+    def read_events(self):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        changed = set()
+        offset = 0
+        while offset + self.EVENT.size <= len(data):
+            wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+            name = data[offset + self.EVENT.size:offset + self.EVENT.size + length].rstrip(b'\0')
+            offset += self.EVENT.size + length
+            if mask & self.IN_Q_OVERFLOW:
+                changed.update(self.roots)
+                continue
+            if wd not in self.watches:
+                continue
+            label, directory = self.watches[wd]
+            changed.add(label)
+            if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                self.watch_tree(label, os.path.join(directory, os.fsdecode(name)))
+        for label in sorted(changed):
+            self.on_change(label)
+
+    def close(self):
+        if self.loop is not None:
+            self.loop.remove_reader(self.fd)
+        os.close(self.fd)
+
+def create_watcher(roots: Dict[str, str], on_change: Callable[[str], None], interval: float = 2.0,
+                   polling: bool = False) -> Tuple[object, str]:
+    """
+    (watcher, kind) over the roots that exist
+
+    inotify is tried first unless polling is forced; kind is 'inotify' or
+    'polling' for the startup banner.
+    """
+    roots = {label: path for label, path in roots.items() if path and os.path.isdir(path)}
+    if not polling:
+        try:
+            return InotifyWatcher(roots, on_change), 'inotify'
+        except (OSError, AttributeError, TypeError):
+            pass
+    return PollingWatcher(roots, on_change, interval), 'polling'
@@ -0,0 +1,227 @@
+"""Rolling five-hour token window"""
+
+from array import array
+from operator import add
+from datetime import datetime
+from typing import List, Dict, Optional, Sequence, Tuple
+
+def minute_of(moment: datetime) -> int:
+    """Epoch minute of a naive local datetime"""
+    return int(moment.timestamp()) // 60
+
+def format_minute(minute: int) -> str:
+    """Local wall-clock label for an epoch minute"""
+    return datetime.fromtimestamp(minute * 60).strftime('%I:%M %p').lstrip('0')
+
+class TokenWindow:
+    """
+    Sliding five-hour token window over a ring of per-minute buckets
+
+    Tokens are bucketed per model in fixed-size arrays indexed by
+    minute % size. A parallel ring of running totals makes "tokens used in
+    the window ending at minute T" an O(1) lookup for any T up to one window
+    past the newest minute, and advancing the clock only clears the buckets
+    that fall out of the window.
+    """
+
+    def __init__(self, limit: int = 200000, minutes: int = 300):
+        self.limit = limit
+        self.size = minutes
+        self.head = None      # Newest minute seen (epoch minutes)
+        self.buckets = {}     # model -> array of per-minute tokens
+        self.by_model = {}    # model -> tokens currently inside the window
+        # Running total of all tokens added up to each of the last size + 1 minutes
+        self.cumulative = array('q', bytes(8 * (minutes + 1)))
+
+    def _running_total(self, minute: int) -> int:
+        return self.cumulative[minute % (self.size + 1)]
+
+    def copy(self) -> 'TokenWindow':
+        clone = TokenWindow(self.limit, self.size)
+        clone.head = self.head
+        clone.buckets = {model: array('q', bucket) for model, bucket in self.buckets.items()}
+        clone.by_model = dict(self.by_model)
+        clone.cumulative = array('q', self.cumulative)
+        return clone
+
+    def entries(self) -> List[Tuple[int, str, int]]:
+        """(minute, model, tokens) for every non-empty bucket inside the window, oldest first"""
+        if self.head is None:
+            return []
+        return [(minute, model, bucket[minute % self.size])
+                for minute in range(self.head - self.size + 1, self.head + 1)
+                for model, bucket in self.buckets.items() if bucket[minute % self.size]]
+
+    def advance(self, minute: int):
+        """Move the clock forward to minute, evicting buckets that fall out"""
+        if self.head is None:
+            self.head = minute
+            return
+        if minute <= self.head:
+            return
+
+        carry = self._running_total(self.head)
+        if minute - self.head > self.size:
+            # Jumped past a whole window: everything is evicted at once
+            for bucket in self.buckets.values():
+                bucket[:] = array('q', bytes(8 * self.size))
+            self.by_model = dict.fromkeys(self.by_model, 0)
+            self.cumulative = array('q', [carry]) * (self.size + 1)
+            self.head = minute
+            return
+
+        for step in range(self.head + 1, minute + 1):
+            slot = step % self.size
+            for model, bucket in self.buckets.items():
+                if bucket[slot]:
+                    self.by_model[model] -= bucket[slot]
+                    bucket[slot] = 0
+            self.cumulative[step % (self.size + 1)] = carry
+        self.head = minute
+
+    def add(self, minute: int, model: str, tokens: int):
+        """
+        Record tokens at minute
+
+        Appends at or after the newest minute are O(1); late arrivals cost
+        O(head - minute) and anything older than the window is ignored.
+        """
+        if self.head is None or minute > self.head:
+            self.advance(minute)
+        if minute <= self.head - self.size or not tokens:
+            return
+
+        bucket = self.buckets.get(model)
+        if bucket is None:
+            bucket = self.buckets[model] = array('q', bytes(8 * self.size))
+        bucket[minute % self.size] += tokens
+        self.by_model[model] = self.by_model.get(model, 0) + tokens
+        for step in range(minute, self.head + 1):
+            self.cumulative[step % (self.size + 1)] += tokens
+
+    def used(self, minute: Optional[int] = None) -> int:
+        """
+        Tokens inside the window ending at minute (default: the newest minute)
+
+        Only usage recorded so far is counted, so looking ahead answers
+        "how much will still be in the window at minute T" in O(1).
+        """
+        if self.head is None:
+            return 0
+        if minute is None:
+            minute = self.head
+        if minute < self.head:
+            raise ValueError('TokenWindow cannot look back before its newest minute')
+        if minute - self.size >= self.head:
+            return 0
+        return self._running_total(self.head) - self._running_total(minute - self.size)
+
+    def remaining(self, minute: Optional[int] = None) -> int:
+        return max(0, self.limit - self.used(minute))
+
+    def reset_minute(self) -> Optional[int]:
+        """Minute at which the oldest tokens still in the window expire"""
+        if not self.used():
+            return None
+        previous = self._running_total(self.head - self.size)
+        for minute in range(self.head - self.size + 1, self.head + 1):
+            current = self._running_total(minute)
+            if current != previous:
+                return minute + self.size
+            previous = current
+        return None
+
+    def project(self, sessions: List[Tuple[int, int, int, str]]) -> Dict:
+        """
+        Roll a copy of the window forward over planned sessions
+
+        sessions are (start_minute, length_minutes, tokens, model) with tokens
+        spread evenly across each session. Minutes before the newest minute
+        are skipped since that usage is already recorded. Returns the peak
+        window usage, when it happens and the first minute over the limit.
+        """
+        planned = {}
+        for start, length, tokens, model in sessions:
+            length = max(1, length)
+            share, extra = divmod(int(tokens), length)
+            for offset in range(length):
+                key = (start + offset, model)
+                planned[key] = planned.get(key, 0) + share + (1 if offset < extra else 0)
+
+        window = self.copy()
+        result = {'peak': window.used(), 'peak_minute': window.head, 'overflow_minute': None}
+        if not planned:
+            return result
+
+        by_minute = {}
+        for (minute, model), tokens in planned.items():
+            by_minute.setdefault(minute, []).append((model, tokens))
+        first = min(by_minute) if window.head is None else max(min(by_minute), window.head)
+
+        for minute in range(first, max(by_minute) + 1):
+            window.advance(minute)
+            for model, tokens in by_minute.get(minute, ()):
+                window.add(minute, model, tokens)
+            used = window.used()
+            if used > result['peak']:
+                result['peak'], result['peak_minute'] = used, minute
+            if result['overflow_minute'] is None and used > self.limit:
+                result['overflow_minute'] = minute
+        return result
+
+    def earliest_start(self, not_before: int, length: int, tokens: int, model: str = 'planned',
+                       planned: Sequence[Tuple[int, int, int, str]] = ()) -> Optional[int]:
+        """
+        First start minute >= not_before at which a session fits the window
+
+        A start fits when every five-hour window holding part of the session
+        stays within the limit, counting recorded usage and the planned
+        sessions (as for project(); they stay where they are). Windows the
+        session does not touch are ignored, so a planned session that is over
+        budget on its own only rules out starts near it. Per-minute totals are
+        built once and each start is checked against them; once the last
+        planned session is a window behind, nothing else is left in the window,
+        so the scan ends there. Returns None if the session can never fit.
+        """
+        if self.head is not None:
+            not_before = max(not_before, self.head)  # Earlier minutes are already recorded
+        length = max(1, length)
+        span = length + self.size - 1  # Windows ending at start .. start + span - 1 hold part of the session
+        settled = max([not_before] + [start + max(1, minutes) for start, minutes, _, _ in planned])
+        last_start = settled + self.size
+        origin = not_before - self.size + 1  # Oldest minute any of those windows reaches back to
+
+        # Planned tokens per minute, from origin to the end of the last window checked
+        added = [0] * (last_start + span - origin)
+        for start, minutes, amount, _ in planned:
+            minutes = max(1, minutes)
+            share, extra = divmod(int(amount), minutes)
+            for offset in range(minutes):
+                minute = start + offset
+                if minute >= origin and (self.head is None or minute >= self.head):
+                    added[minute - origin] += share + (1 if offset < extra else 0)
+
+        # Recorded plus planned usage in the window ending at each minute from not_before on
+        base = []
+        windowed = sum(added[:self.size - 1])
+        for index in range(self.size - 1, len(added)):
+            windowed += added[index]
+            minute = origin + index
+            base.append(windowed + self.used(minute))
+            windowed -= added[index - self.size + 1]
+
+        # The session's own tokens in the window ending `offset` minutes after it starts
+        share, extra = divmod(int(tokens), length)
+        own = [share + (1 if offset < extra else 0) for offset in range(length)] + [0] * (self.size - 1)
+        profile, windowed = [], 0
+        for offset in range(span):
+            windowed += own[offset]
+            if offset >= self.size:
+                windowed -= own[offset - self.size]
+            profile.append(windowed)
+
+        for start in range(not_before, last_start + 1):
+            index = start - not_before
+            if max(map(add, base[index:index + span], profile)) <= self.limit:
+                return start
+        return None
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+
+"""
+Hot-path benchmark for the ical_intelligence package
+
+Generates a synthetic ~/.claude (JSONL usage logs) and calendar folder
+(single events plus recurring series with EXDATEs, moved instances and
+time zones), then measures each stage in-process: throughput, p50/p99
+latency per call and peak traced memory. Peak memory comes from a separate
+tracemalloc pass so it does not skew the timings.
+
+Results can be written as JSON and compared with a run from another commit:
+
+    python tests/ical-benchmark.py --json before.json
+    git checkout my-branch
+    python tests/ical-benchmark.py --compare before.json [--fail-over 15]
+
+Usage:
+    python tests/ical-benchmark.py [--events 20000] [--recurring 0.1] [--jsonl-lines 100000]
+                                   [--calls 20000] [--repeat 3] [--workers 1] [--seed 7]
+                                   [--json FILE] [--compare FILE] [--fail-over PCT]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import importlib.util
+import tempfile
+import tracemalloc
+import subprocess
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'scripts'))
+
+COMPLEXITIES = ('low', 'medium', 'high', 'critical')
+MODELS = ('opus', 'sonnet', 'haiku')
+TOPICS = ('OAuth flow', 'Billing API', 'Search index', 'Dashboard', 'Migrations', 'CI pipeline',
+          'Webhooks', 'Caching layer', 'Onboarding', 'Audit log')
+ZONES = ('America/New_York', 'Europe/Berlin', 'Asia/Tokyo')
+WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR')
+
+def session_title(rng: random.Random, i: int) -> str:
+    """Unique event title with the tags a real calendar would carry"""
+    tags = [f'#complexity:{rng.choice(COMPLEXITIES)}', f'#project:project-{rng.randrange(8)}']
+    if rng.random() < 0.3:
+        tags.append(f'#model:{rng.choice(MODELS)}')
+    if rng.random() < 0.1:
+        tags.append(f'#tokens:{rng.randrange(10, 90)}k')
+    if rng.random() < 0.2:
+        tags.append('#agents:claude,droid')
+    return f"{rng.choice(TOPICS)} {i} {' '.join(tags)}"
+
+def make_calendar(folder: Path, events: int, recurring: float, rng: random.Random) -> int:
+    """
+    .ics files with `events` VEVENTs spread from 60 days ago to 30 days ahead
+
+    A `recurring` share are RRULE series (daily or weekly, bounded by COUNT,
+    UNTIL or open-ended) with EXDATEs and some moved instances; a few use a
+    TZID. Returns the total size in bytes.
+    """
+    folder.mkdir(parents=True)
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    files = max(1, events // 5000)
+    for f in range(files):
+        lines = ['BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//ical-benchmark//EN']
+        for i in range(f, events, files):
+            start = now + timedelta(days=rng.randrange(-60, 30), hours=rng.randrange(-8, 10))
+            end = start + timedelta(minutes=rng.choice((30, 60, 90, 120, 180, 240)))
+            uid = f'bench-{i}@example.com'
+            lines += ['BEGIN:VEVENT', f'UID:{uid}', f'SUMMARY:{session_title(rng, i)}',
+                      f'DESCRIPTION:Synthetic session {i}\\, generated for benchmarking']
+            zone = rng.choice(ZONES) if rng.random() < 0.2 else None
+            stamp = (lambda moment: f';TZID={zone}:{moment:%Y%m%dT%H%M%S}') if zone else \
+                (lambda moment: f':{moment:%Y%m%dT%H%M%S}')
+            lines += [f'DTSTART{stamp(start)}', f'DTEND{stamp(end)}']
+            if rng.random() < recurring:
+                if rng.random() < 0.5:
+                    rule = f'FREQ=WEEKLY;BYDAY={",".join(rng.sample(WEEKDAYS, rng.randrange(1, 4)))}'
+                else:
+                    rule = f'FREQ=DAILY;INTERVAL={rng.randrange(1, 4)}'
+                bound = rng.random()
+                if bound < 0.4:
+                    rule += f';COUNT={rng.randrange(5, 60)}'
+                elif bound < 0.8:
+                    rule += f';UNTIL={start + timedelta(days=rng.randrange(14, 120)):%Y%m%dT%H%M%S}'
+                lines.append(f'RRULE:{rule}')
+                for skip in range(rng.randrange(3)):
+                    lines.append(f'EXDATE{stamp(start + timedelta(days=7 * (skip + 1)))}')
+                lines.append('END:VEVENT')
+                if rng.random() < 0.3:
+                    moved = start + timedelta(days=7)
+                    lines += ['BEGIN:VEVENT', f'UID:{uid}', f'RECURRENCE-ID{stamp(moved)}',
+                              f'SUMMARY:{session_title(rng, i)} (moved)',
+                              f'DTSTART{stamp(moved + timedelta(hours=2))}',
+                              f'DTEND{stamp(moved + timedelta(hours=3))}', 'END:VEVENT']
+            else:
+                lines.append('END:VEVENT')
+        lines.append('END:VCALENDAR')
+        (folder / f'bench-{f}.ics').write_text('\r\n'.join(lines) + '\r\n')
+    return sum(path.stat().st_size for path in folder.iterdir())
+
+def make_usage(projects: Path, lines: int, rng: random.Random, project_count: int = 8,
+               files_per_project: int = 4) -> int:
+    """
+    JSONL transcripts with `lines` lines over the last 60 days
+
+    About a third are user/tool lines without usage, as in real transcripts.
+    Directory names contain the #project tags used by make_calendar(), so
+    calibration can match them. Returns the total size in bytes.
+    """
+    now = datetime.now(timezone.utc)
+    total = 0
+    per_file = max(1, lines // (project_count * files_per_project))
+    for p in range(project_count):
+        folder = projects / f'-Users-dev-project-{p}'
+        folder.mkdir(parents=True)
+        for s in range(files_per_project):
+            rows = []
+            for _ in range(per_file):
+                timestamp = (now - timedelta(minutes=rng.randrange(60 * 24 * 60))).isoformat()
+                if rng.random() < 0.33:
+                    rows.append(json.dumps({'type': 'user', 'timestamp': timestamp,
+                                            'message': {'role': 'user', 'content': 'Please continue'}}))
+                    continue
+                rows.append(json.dumps({
+                    'type': 'assistant',
+                    'timestamp': timestamp,
+                    'message': {
+                        'model': f'claude-{rng.choice(MODELS)}-4',
+                        'usage': {'input_tokens': rng.randrange(200, 8000), 'output_tokens': rng.randrange(50, 2000)}
+                    }
+                }))
+            path = folder / f'session-{s}.jsonl'
+            path.write_text('\n'.join(rows) + '\n')
+            total += path.stat().st_size
+    return total
+
+def percentile(sorted_samples, q: float) -> float:
+    return sorted_samples[min(len(sorted_samples) - 1, int(round(q * (len(sorted_samples) - 1))))]
+
+def summarize(samples_ns, items: int, nbytes: int = 0, peak: int = 0) -> dict:
+    """Stage result from per-call nanoseconds; items (and bytes) processed across all calls"""
+    ordered = sorted(samples_ns)
+    seconds = sum(ordered) / 1e9
+    result = {
+        'calls': len(ordered),
+        'items': items,
+        'throughput': round(items / seconds, 1) if seconds else None,
+        'p50_us': round(percentile(ordered, 0.50) / 1000, 3),
+        'p99_us': round(percentile(ordered, 0.99) / 1000, 3),
+        'mean_us': round(seconds / len(ordered) * 1e6, 3),
+        'peak_kib': round(peak / 1024, 1)
+    }
+    if nbytes:
+        result['mb_per_s'] = round(nbytes / seconds / 1e6, 2)
+    return result
+
+def traced_peak(run) -> int:
+    """Peak bytes allocated above the starting point while run() executes"""
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        run()
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+def per_call(fn, inputs) -> list:
+    """Nanoseconds for each fn(*args) (timer overhead, ~0.1 µs, included)"""
+    clock = time.perf_counter_ns
+    samples = []
+    for args in inputs:
+        started = clock()
+        fn(*args)
+        samples.append(clock() - started)
+    return samples
+
+def run_stages(args, home: Path, calendar: Path, calendar_bytes: int, usage_bytes: int) -> dict:
+    from ical_intelligence.bridge import iCalTokenBridge
+    from ical_intelligence.index import CalendarIndex
+    from ical_intelligence.metadata import parse_session_text
+    from ical_intelligence.usage import UsageAggregator
+
+    rng = random.Random(args.seed + 1)
+    scratch = home / 'scratch'
+    scratch.mkdir()
+    stages = {}
+
+    def report(name: str, result: dict):
+        stages[name] = result
+        extra = f"  {result['mb_per_s']:>8,.1f} MB/s" if 'mb_per_s' in result else ''
+        print(f"  {name:<34} {result['throughput'] or 0:>13,.0f}/s {result['p50_us']:>12,.1f} "
+              f"{result['p99_us']:>12,.1f} {result['peak_kib']:>10,.0f}{extra}")
+
+    print(f"  {'stage':<34} {'throughput':>15} {'p50 µs':>12} {'p99 µs':>12} {'peak KiB':>10}")
+
+    # Cold ingestion: a fresh index/checkpoint each repeat
+    def index_once(n: int):
+        return CalendarIndex(scratch / f'index-{n}.db').refresh(calendar, args.workers)
+    samples, events = [], 0
+    for n in range(args.repeat):
+        started = time.perf_counter_ns()
+        events += index_once(n)['events']
+        samples.append(time.perf_counter_ns() - started)
+    report('calendar.index (cold)', summarize(samples, events, calendar_bytes * args.repeat,
+                                              traced_peak(lambda: index_once(args.repeat))))
+
+    def usage_once(n: int):
+        return UsageAggregator(home / '.claude' / 'projects', scratch / f'checkpoint-{n}.json').refresh(
+            workers=args.workers)
+    samples = []
+    for n in range(args.repeat):
+        started = time.perf_counter_ns()
+        usage_once(n)
+        samples.append(time.perf_counter_ns() - started)
+    report('usage.refresh (cold)', summarize(samples, args.jsonl_lines * args.repeat, usage_bytes * args.repeat,
+                                             traced_peak(lambda: usage_once(args.repeat))))
+
+    bridge = iCalTokenBridge()
+    bridge.workers = args.workers
+    bridge.get_current_budget_status()
+    samples = per_call(bridge.get_current_budget_status, [()] * args.repeat * 20)
+    report('get_current_budget_status', summarize(samples, len(samples),
+                                                  peak=traced_peak(bridge.get_current_budget_status)))
+
+    # Week lookups as a fresh CLI run sees them: recurring series expanded from scratch
+    bridge.calendar_index
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    weeks = [today + timedelta(days=rng.randrange(-60, 24)) for _ in range(args.repeat * 20)]
+    sessions = []
+
+    def query(start):
+        bridge.occurrences.clear()
+        sessions.extend(bridge.get_calendar_sessions(start, start + timedelta(days=7)))
+    samples = per_call(query, [(start,) for start in weeks])
+    report('calendar.query (week)', summarize(samples, len(sessions),
+                                              peak=traced_peak(lambda: query(weeks[0]))))
+
+    titles = [(session_title(rng, i), f'Synthetic session {i}') for i in range(args.calls)]
+    parse_session_text.cache_clear()  # Distinct titles, so every call is a cache miss
+    samples = per_call(bridge.parse_session_metadata, titles)
+    parse_session_text.cache_clear()
+    report('parse_session_metadata', summarize(samples, len(samples), peak=traced_peak(
+        lambda: [bridge.parse_session_metadata(*title) for title in titles[:1000]])))
+
+    metadata = [bridge.parse_session_metadata(*title) for title in titles]
+    plans = [(rng.choice((0.5, 1.0, 1.5, 2.0, 3.0, 4.0)), m, today + timedelta(hours=rng.randrange(24)))
+             for m in metadata]
+
+    def predict_stage(name: str):
+        samples = per_call(bridge.predict_session_tokens, plans)
+        report(name, summarize(samples, len(samples), peak=traced_peak(
+            lambda: [bridge.predict_session_tokens(*plan) for plan in plans[:1000]])))
+    bridge.calibration = None
+    predict_stage('predict_session_tokens')
+
+    costs = [(rng.randrange(1000, 200000), rng.choice(MODELS)) for _ in range(args.calls)]
+    samples = per_call(bridge.estimate_cost, costs)
+    report('estimate_cost', summarize(samples, len(samples), peak=traced_peak(
+        lambda: [bridge.estimate_cost(*cost) for cost in costs[:1000]])))
+
+    if importlib.util.find_spec('numpy') is None:
+        print('  (NumPy not installed: skipping calibrate and predict_sessions_batch)')
+        return stages
+
+    started = time.perf_counter_ns()
+    calibration = bridge.calibrate()
+    elapsed = time.perf_counter_ns() - started
+    if calibration is not None:
+        report('calibrate', summarize([elapsed], calibration.samples, peak=traced_peak(bridge.calibrate)))
+        predict_stage('predict_session_tokens (calibrated)')
+
+    batch = (
+        [plan[0] for plan in plans],
+        [m['complexity'] for m in metadata],
+        [plan[2] for plan in plans],
+        [m.get('model', 'sonnet') for m in metadata],
+        [m.get('explicit_tokens') for m in metadata],
+        [m.get('project') for m in metadata]
+    )
+
+    def predict_batch():
+        bridge.predict_sessions_batch(*batch[:4], explicit_tokens=batch[4], projects=batch[5])
+    samples = per_call(predict_batch, [()] * args.repeat)
+    report('predict_sessions_batch', summarize(samples, len(plans) * args.repeat, peak=traced_peak(predict_batch)))
+    return stages
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def compare(baseline: dict, current: dict, fail_over: float) -> bool:
+    """Print p50/throughput changes per stage; False if a p50 regressed by more than fail_over percent"""
+    print(f"\nCompared with {baseline['meta']['commit']} ({baseline['meta']['timestamp']}):")
+    if baseline['meta']['params'] != current['meta']['params']:
+        print('  ⚠️  Parameters differ between the runs; numbers are not directly comparable')
+    print(f"  {'stage':<34} {'p50 before':>12} {'p50 now':>12} {'change':>8} {'throughput':>11}")
+    ok = True
+    for name, now in current['stages'].items():
+        before = baseline['stages'].get(name)
+        if before is None:
+            print(f"  {name:<34} {'-':>12} {now['p50_us']:>12,.1f}      new")
+            continue
+        change = (now['p50_us'] / before['p50_us'] - 1) * 100 if before['p50_us'] else 0.0
+        rate = ((now['throughput'] or 0) / before['throughput'] - 1) * 100 if before.get('throughput') else 0.0
+        flag = ''
+        if fail_over is not None and change > fail_over:
+            flag, ok = '  ✗', False
+        print(f"  {name:<34} {before['p50_us']:>12,.1f} {now['p50_us']:>12,.1f} {change:>+7.1f}% {rate:>+10.1f}%{flag}")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description='Throughput, latency and memory per ical_intelligence stage')
+    parser.add_argument('--events', type=int, default=20000, help='Calendar events to generate')
+    parser.add_argument('--recurring', type=float, default=0.1, help='Share of events that are recurring series')
+    parser.add_argument('--jsonl-lines', type=int, default=100000, help='JSONL transcript lines to generate')
+    parser.add_argument('--calls', type=int, default=20000, help='Calls per per-call stage')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs of each ingestion stage')
+    parser.add_argument('--workers', type=int, default=1, help='Ingestion processes (1 = single core)')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed for the generators')
+    parser.add_argument('--json', metavar='FILE', help='Write machine-readable results here')
+    parser.add_argument('--compare', metavar='FILE', help='Results of an earlier run to compare against')
+    parser.add_argument('--fail-over', type=float, metavar='PCT',
+                        help='With --compare, exit 1 if any stage p50 got slower by more than PCT percent')
+    args = parser.parse_args()
+
+    home = Path(tempfile.mkdtemp(prefix='ical-bench-'))
+    try:
+        rng = random.Random(args.seed)
+        calendar = home / 'Calendars'
+        started = time.perf_counter()
+        calendar_bytes = make_calendar(calendar, args.events, args.recurring, rng)
+        usage_bytes = make_usage(home / '.claude' / 'projects', args.jsonl_lines, rng)
+        print(f"Generated {args.events:,} events ({calendar_bytes / 1e6:.1f} MB) and {args.jsonl_lines:,} "
+              f"JSONL lines ({usage_bytes / 1e6:.1f} MB) in {time.perf_counter() - started:.1f}s\n")
+
+        os.environ['HOME'] = str(home)
+        os.environ['ICAL_CALENDAR_PATH'] = str(calendar)
+        stages = run_stages(args, home, calendar, calendar_bytes, usage_bytes)
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+    params = {key: getattr(args, key) for key in ('events', 'recurring', 'jsonl_lines', 'calls', 'repeat',
+                                                  'workers', 'seed')}
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'params': params
+        },
+        'stages': stages
+    }
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2) + '\n')
+        print(f"\nResults written to {args.json}")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if not compare(baseline, results, args.fail_over):
+            print('FAIL: stage latency regressed beyond --fail-over')
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
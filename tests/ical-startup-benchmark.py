@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+"""
+Startup benchmark for scripts/ical-intelligence.py
+
+Times cold CLI invocations (fresh interpreter each run) against a synthetic
+~/.claude, and shows which ical_intelligence modules each command imports.
+Exits non-zero when `status` answered from the snapshot takes longer than
+the budget on top of a bare interpreter (`python -c pass`), so startup
+regressions show up in CI without interpreter startup, which varies from
+machine to machine, eating into the budget.
+
+Usage:
+    python tests/ical-startup-benchmark.py [--runs 20] [--budget-ms 10]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPT = ROOT / 'scripts' / 'ical-intelligence.py'
+
+def make_home(home: Path, projects: int = 20, lines: int = 500):
+    """Synthetic ~/.claude with recent usage and a small calendar"""
+    now = datetime.now(timezone.utc)
+    for p in range(projects):
+        project = home / '.claude' / 'projects' / f'-Users-dev-project-{p}'
+        project.mkdir(parents=True)
+        with open(project / 'session.jsonl', 'w') as f:
+            for i in range(lines):
+                f.write(json.dumps({
+                    'type': 'assistant',
+                    'timestamp': (now - timedelta(minutes=i * 7)).isoformat(),
+                    'message': {
+                        'model': 'claude-sonnet-4' if i % 3 else 'claude-opus-4',
+                        'usage': {'input_tokens': 1200 + i, 'output_tokens': 300}
+                    }
+                }) + '\n')
+
+    calendar = home / 'Calendars'
+    calendar.mkdir()
+    today = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+    with open(calendar / 'work.ics', 'w') as f:
+        f.write('BEGIN:VCALENDAR\r\n')
+        for i in range(50):
+            start = today + timedelta(days=i // 5 - 5, hours=(i % 5) * 2)
+            f.write(f'BEGIN:VEVENT\r\nUID:bench-{i}\r\nDTSTART:{start:%Y%m%dT%H%M%S}\r\n'
+                    f'DTEND:{start + timedelta(hours=1):%Y%m%dT%H%M%S}\r\n'
+                    f'SUMMARY:Session {i} #complexity:medium #project:project-{i % 4}\r\nEND:VEVENT\r\n')
+        f.write('END:VCALENDAR\r\n')
+
+def time_runs(command, env, runs, before=None):
+    """Wall-clock milliseconds of each run"""
+    samples = []
+    for _ in range(runs):
+        if before:
+            before()
+        started = time.perf_counter()
+        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+def imported_modules(args, env):
+    """(module, cumulative ms) for every ical_intelligence module a command imports"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', str(SCRIPT)] + args, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'ical_intelligence' not in line:
+            continue
+        _, _, cumulative, name = (part.strip() for part in line.replace('import time:', '|').split('|'))
+        modules.append((name, int(cumulative) / 1000))
+    return modules
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold-start timings for ical-intelligence.py')
+    parser.add_argument('--runs', type=int, default=20, help='Runs per command')
+    parser.add_argument('--budget-ms', type=float, default=10.0,
+                        help='Fail if the median snapshot `status` takes this much longer than `python -c pass`')
+    args = parser.parse_args()
+
+    home = Path(tempfile.mkdtemp(prefix='ical-bench-'))
+    try:
+        make_home(home)
+        env = dict(os.environ, HOME=str(home), ICAL_CALENDAR_PATH=str(home / 'Calendars'))
+        snapshot = home / '.claude' / 'ical-status.snapshot'
+        subprocess.run([sys.executable, str(SCRIPT), 'today'], env=env, stdout=subprocess.DEVNULL, check=True)
+
+        cases = [
+            ('python -c pass', [sys.executable, '-c', 'pass'], None),
+            ('status (snapshot)', [sys.executable, str(SCRIPT), 'status'], None),
+            ('status (live)', [sys.executable, str(SCRIPT), 'status'],
+             lambda: snapshot.unlink(missing_ok=True)),
+            ('today', [sys.executable, str(SCRIPT), 'today'], None),
+        ]
+        print(f"{'command':<20} {'median':>9} {'min':>9} {'max':>9}")
+        medians = {}
+        for name, command, before in cases:
+            samples = time_runs(command, env, args.runs, before)
+            medians[name] = statistics.median(samples)
+            print(f'{name:<20} {medians[name]:>7.1f}ms {min(samples):>7.1f}ms {max(samples):>7.1f}ms')
+
+        for command in (['status'], ['today']):
+            modules = imported_modules(command, env)
+            print(f"\nical_intelligence modules imported by `{command[0]}`:")
+            for name, cumulative in modules:
+                print(f'  {name:<34} {cumulative:>6.1f}ms')
+
+        status_ms = medians['status (snapshot)']
+        overhead_ms = status_ms - medians['python -c pass']
+        print(f"\nstatus (snapshot): {status_ms:.1f}ms "
+              f"({overhead_ms:.1f}ms over bare interpreter), budget {args.budget_ms:g}ms over bare interpreter")
+        if overhead_ms > args.budget_ms:
+            print('FAIL: status startup is over budget')
+            sys.exit(1)
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
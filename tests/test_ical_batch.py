@@ -0,0 +1,133 @@
+"""predict_sessions_batch() and `predict` against the scalar predict_session_tokens() and estimate_cost()"""
+
+import re
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+
+from ical_intelligence.calibration import TokenCalibration
+
+np = pytest.importorskip('numpy')
+
+LEVELS = ['low', 'medium', 'high', 'critical']
+PROJECTS = [None, 'organized-ai', 'website', 'unfitted']
+MODELS = ['sonnet', 'opus', 'haiku', 'unknown']
+
+@pytest.fixture
+def bridge(tmp_path, monkeypatch):
+    from ical_intelligence.bridge import iCalTokenBridge
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('ICAL_CALENDAR_PATH', str(tmp_path / 'cal'))
+    return iCalTokenBridge()
+
+def calibration() -> TokenCalibration:
+    return TokenCalibration(
+        complexity={'low': 3100.5, 'medium': 9400.0, 'high': 21000.3, 'critical': 47000.0},
+        projects={'organized-ai': {'high': 26500.7}, 'website': {'low': 1800.0, 'medium': 7000.2}},
+        time_of_day={'early': 0.8, 'morning': 1.1, 'afternoon': 1.0, 'evening': 0.9, 'night': 1.3},
+        residuals={'*': {'low': 0.6, 'high': 1.7, 'withinBuffer': 0.55, 'n': 40},
+                   'high': {'low': 0.7, 'high': 1.4, 'withinBuffer': 0.62, 'n': 12},
+                   'critical': {'low': 0.5, 'high': 2.2, 'withinBuffer': 0.3, 'n': 3}},
+        samples=40
+    )
+
+def random_sessions(count: int, seed: int):
+    rng = random.Random(seed)
+    first = datetime(2025, 3, 1)
+    return [{
+        'duration': rng.choice([0.25, 0.5, 1.0, 1.5, 2.0, 3.0]) * rng.choice([1, 1, 1.1, 0.9]),
+        'complexity': rng.choice(LEVELS),
+        'start': first + timedelta(minutes=rng.randrange(60 * 24 * 90)),
+        'model': rng.choice(MODELS),
+        'tokens': rng.choice([None] * 5 + [0, 1500, 45000, 2000000]),
+        'project': rng.choice(PROJECTS)
+    } for _ in range(count)]
+
+def assert_batch_matches_scalar(bridge, sessions):
+    batch = bridge.predict_sessions_batch(
+        [s['duration'] for s in sessions], [s['complexity'] for s in sessions], [s['start'] for s in sessions],
+        [s['model'] for s in sessions], [s['tokens'] for s in sessions], [s['project'] for s in sessions]
+    )
+    for i, session in enumerate(sessions):
+        metadata = {'complexity': session['complexity']}
+        if session['tokens'] is not None:
+            metadata['explicit_tokens'] = session['tokens']
+        if session['project']:
+            metadata['project'] = session['project']
+        prediction = bridge.predict_session_tokens(session['duration'], metadata, session['start'])
+
+        assert batch['base'][i] == prediction['base'], session
+        assert batch['buffer'][i] == prediction['buffer'], session
+        assert batch['max'][i] == prediction['max'], session
+        assert batch['confidence'][i] == prediction['confidence'], session
+        assert batch['cost'][i] == bridge.estimate_cost(prediction['base'], session['model']), session
+        assert batch['start'][i] == np.datetime64(session['start'], 'm')
+        if 'interval_low' in batch:
+            assert (batch['interval_low'][i], batch['interval_high'][i]) == \
+                prediction.get('interval', (prediction['base'], prediction['base'])), session
+
+def test_rule_based_batch_matches_scalar(bridge):
+    bridge.calibration = None
+    assert_batch_matches_scalar(bridge, random_sessions(20000, seed=1))
+
+def test_calibrated_batch_matches_scalar(bridge):
+    bridge.calibration = calibration()
+    assert_batch_matches_scalar(bridge, random_sessions(20000, seed=2))
+
+def test_unknown_complexity_raises_like_the_scalar_path(bridge):
+    bridge.calibration = None
+    with pytest.raises(KeyError):
+        bridge.predict_session_tokens(1.0, {'complexity': 'extreme'})
+    with pytest.raises(KeyError):
+        bridge.predict_sessions_batch([1.0], ['extreme'], [datetime(2025, 3, 1, 9)])
+    # An explicit #tokens estimate needs no rate
+    batch = bridge.predict_sessions_batch([1.0], ['extreme'], [datetime(2025, 3, 1, 9)], explicit_tokens=[5000])
+    assert batch['base'][0] == 5000
+
+def write_calendar(tmp_path):
+    rng = random.Random(4)
+    titles = ['Fix login #complexity:low', 'Design sync', 'Migration #tokens:45k #model:opus', 'Review #project:website']
+    lines = ['BEGIN:VCALENDAR']
+    for i in range(300):
+        start = datetime(2025, 3, 1, 8) + timedelta(minutes=15 * rng.randrange(4 * 24 * 20))
+        lines += ['BEGIN:VEVENT', f'UID:e{i}', f'SUMMARY:{rng.choice(titles)}', f'DTSTART:{start:%Y%m%dT%H%M%S}',
+                  f'DTEND:{start + timedelta(minutes=30 * rng.randrange(1, 6)):%Y%m%dT%H%M%S}', 'END:VEVENT']
+    lines += ['BEGIN:VEVENT', 'UID:standup', 'SUMMARY:Standup #complexity:high', 'DTSTART:20250303T093000',
+              'DTEND:20250303T100000', 'RRULE:FREQ=DAILY;COUNT=10', 'END:VEVENT', 'END:VCALENDAR']
+    (tmp_path / 'cal').mkdir()
+    (tmp_path / 'cal' / 'work.ics').write_text('\r\n'.join(lines) + '\r\n', newline='')
+
+def test_predict_range_totals_match_per_session_predictions(bridge, tmp_path, capsys):
+    write_calendar(tmp_path)
+    start, end = datetime(2025, 3, 1), datetime(2025, 3, 15)
+    bridge.show_predict_range(start, end)
+    total = re.search(r'Total: ([\d,]+) sessions, ([\d,]+) tokens .*\$([\d.]+)', capsys.readouterr().out)
+
+    sessions = bridge.get_calendar_sessions(start, end)
+    tokens, cost = 0, 0.0
+    for session in sessions:
+        metadata = bridge.parse_session_metadata(session['title'], session['description'])
+        base = bridge.predict_session_tokens(session['duration_hours'], metadata, session['start'])['base']
+        tokens += base
+        cost += bridge.estimate_cost(base, metadata.get('model', 'sonnet'))
+    assert total.groups() == (f'{len(sessions):,}', f'{tokens:,}', f'{cost:.2f}')
+
+def test_predict_range_profile_stages_do_not_nest(bridge, tmp_path, monkeypatch, capsys):
+    write_calendar(tmp_path)
+    open_stages, nested = [], []
+
+    @contextmanager
+    def stage(name):
+        if open_stages:
+            nested.append((open_stages[-1], name))
+        open_stages.append(name)
+        try:
+            yield
+        finally:
+            open_stages.pop()
+
+    monkeypatch.setattr(bridge.profiler, 'stage', stage)
+    bridge.show_predict_range(datetime(2025, 3, 1), datetime(2025, 3, 15))
+    assert nested == []  # e.g. the first index refresh inside calendar.query
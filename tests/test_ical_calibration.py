@@ -0,0 +1,83 @@
+"""fit_token_calibration() on synthetic hourly usage with known rates"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from ical_intelligence.calibration import fit_token_calibration, project_matches
+
+pytest.importorskip('numpy')
+
+TOKEN_RATES = {'low': 5000, 'medium': 10000}
+PRIOR = 3.0  # fit_token_calibration's default prior_weight
+
+def shrunk(observed, prior):
+    return (sum(observed) + PRIOR * prior) / (len(observed) + PRIOR)
+
+def history(days: int = 6):
+    """
+    Sessions and the usage they coincided with, one day apart
+
+    Untagged medium sessions burn 12k/h in the morning and 18k/h in the
+    evening; #project:website low sessions burn 6k/h in the afternoon, while
+    a website-old checkout next to it burns 50k/h at the same time.
+    """
+    sessions, usage = [], {'-home-me-api': {}, '-home-me-website': {}, '-home-me-website-old': {}}
+    for day in range(days):
+        date = datetime(2025, 11, 3) + timedelta(days=day)
+        for project, complexity, hour, hours, directory, rate in [
+            (None, 'medium', 10, 1, '-home-me-api', 12000),
+            ('website', 'low', 14, 2, '-home-me-website', 6000),
+            (None, 'medium', 18, 1, '-home-me-api', 18000)
+        ]:
+            start = date.replace(hour=hour)
+            sessions.append((project, complexity, start, start + timedelta(hours=hours)))
+            for offset in range(hours):
+                epoch_hour = str(int(start.timestamp()) // 3600 + offset)
+                usage[directory][epoch_hour] = rate
+                if directory == '-home-me-website':
+                    usage['-home-me-website-old'][epoch_hour] = 50000
+    return sessions, usage
+
+def fit(sessions, usage, **options):
+    projects, complexities, starts, ends = zip(*sessions)
+    return fit_token_calibration(TOKEN_RATES, projects, complexities, starts, ends, usage, **options)
+
+def test_project_tags_match_whole_trailing_path_components():
+    assert project_matches('website', 'website')
+    assert project_matches('-home-me-website', 'website')
+    assert project_matches('-home-me-organized-ai', 'organized-ai')
+    assert not project_matches('-home-me-website-old', 'website')
+    assert not project_matches('-home-me-mywebsite', 'website')
+
+def test_fit_recovers_known_rates_and_time_of_day_factors():
+    sessions, usage = history()
+    calibration = fit(sessions, usage)
+    assert calibration.samples == len(sessions)
+
+    medium = shrunk([12000] * 6 + [18000] * 6, TOKEN_RATES['medium'])
+    low = shrunk([6000] * 6, TOKEN_RATES['low'])
+    website_low = shrunk([6000] * 6, low)  # Not the website-old usage
+    assert calibration.complexity == pytest.approx({'low': low, 'medium': medium}, abs=0.05)
+    assert calibration.projects == {'website': pytest.approx({'low': website_low}, abs=0.05)}
+
+    factors = {
+        'morning': shrunk([12000 / medium] * 6, 1.0),
+        'afternoon': shrunk([6000 / website_low] * 6, 1.0),
+        'evening': shrunk([18000 / medium] * 6, 1.0),
+        'early': 1.0,
+        'night': 1.0
+    }
+    assert calibration.time_of_day == pytest.approx(factors, abs=5e-5)
+    assert calibration.time_of_day['evening'] > 1 > calibration.time_of_day['morning']
+    assert calibration.residuals['*']['n'] == len(sessions)
+
+def test_too_few_sessions_with_usage_gives_none():
+    sessions, usage = history(days=2)  # Six sessions
+    assert fit(sessions, usage) is not None
+    assert fit(sessions, usage, min_samples=7) is None
+
+    # Sessions without any recorded usage do not count toward min_samples
+    quiet = [(None, 'low', start + timedelta(days=30), end + timedelta(days=30)) for _, _, start, end in sessions]
+    assert fit(sessions[:4] + quiet, usage) is None
+    assert fit_token_calibration(TOKEN_RATES, [], [], [], [], usage) is None
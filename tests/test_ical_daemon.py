@@ -0,0 +1,66 @@
+"""IntelligenceServer requests and the CLI paths that go through a running daemon"""
+
+import json
+import threading
+import socketserver
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from ical_intelligence.bridge import iCalTokenBridge
+from ical_intelligence.daemon import IntelligenceServer
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('ICAL_CALENDAR_PATH', str(tmp_path / 'cal'))
+    monkeypatch.setenv('ICAL_SOCKET_PATH', str(tmp_path / 'daemon.sock'))
+    # Heavy recent usage, so the planned session runs into the five-hour limit
+    project = tmp_path / '.claude' / 'projects' / '-work-app'
+    project.mkdir(parents=True)
+    now = datetime.now(timezone.utc)
+    lines = [json.dumps({
+        'type': 'assistant',
+        'timestamp': (now - timedelta(minutes=minutes)).isoformat().replace('+00:00', 'Z'),
+        'message': {'model': 'claude-sonnet', 'usage': {'input_tokens': 30000, 'output_tokens': 8000}}
+    }) for minutes in (200, 150, 90, 40, 10)]
+    (project / 'session.jsonl').write_text('\n'.join(lines) + '\n')
+    return tmp_path
+
+def run_daemon(server: IntelligenceServer, methods: list):
+    """Answer requests on server.socket_path from a thread, as `serve` would, recording each method"""
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                request = json.loads(line)
+                methods.append(request['method'])
+                self.wfile.write(json.dumps(server.dispatch(request), default=str).encode() + b'\n')
+
+    listener = socketserver.ThreadingUnixStreamServer(server.socket_path, Handler)
+    threading.Thread(target=listener.serve_forever, daemon=True).start()
+    return listener
+
+def plan(monkeypatch, capsys, start: str):
+    answers = iter(['Refactor billing', '3', 'critical', start])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(answers))
+    bridge = iCalTokenBridge()
+    bridge.interactive_session_planner()
+    return bridge, capsys.readouterr().out
+
+def test_plan_asks_a_running_daemon(home, monkeypatch, capsys):
+    start = (datetime.now() + timedelta(hours=1)).strftime('%H:%M')
+    _, local = plan(monkeypatch, capsys, start)
+
+    methods = []
+    listener = run_daemon(IntelligenceServer(iCalTokenBridge()), methods)
+    try:
+        bridge, served = plan(monkeypatch, capsys, start)
+    finally:
+        listener.shutdown()
+        listener.server_close()
+
+    assert methods == ['status', 'predict', 'window']
+    assert bridge.usage is None  # Nothing aggregated in-process
+    assert 'WARNING: Session would exceed budget' in served
+    assert served == local
@@ -0,0 +1,90 @@
+"""CalendarIndex rows and incremental refresh (resume only when the parsed head is unchanged)"""
+
+import os
+from datetime import datetime
+
+from ical_intelligence.index import CalendarIndex
+
+def vevent(uid: str, summary: str, day: int) -> str:
+    return (f'BEGIN:VEVENT\r\nUID:{uid}\r\nSUMMARY:{summary}\r\n'
+            f'DTSTART:202512{day:02d}T090000\r\nDTEND:202512{day:02d}T100000\r\nEND:VEVENT\r\n')
+
+def write(path, *events: str, mtime: int):
+    path.write_text('BEGIN:VCALENDAR\r\n' + ''.join(events), newline='')
+    os.utime(path, (mtime, mtime))
+
+def titles(index: CalendarIndex):
+    return sorted(event['SUMMARY'] for event in index.iter_events())
+
+def test_appended_events_are_resumed(tmp_path):
+    calendar = tmp_path / 'cal'
+    calendar.mkdir()
+    path = calendar / 'work.ics'
+    index = CalendarIndex(tmp_path / 'index.db')
+
+    write(path, vevent('a', 'First', 1), mtime=1000)
+    assert index.refresh(calendar)['parsed'] == 1
+    write(path, vevent('a', 'First', 1), vevent('b', 'Second', 2), mtime=2000)
+    stats = index.refresh(calendar)
+    assert (stats['resumed'], stats['parsed'], stats['events']) == (1, 0, 1)
+    assert titles(index) == ['First', 'Second']
+
+def test_edit_above_offset_reparses(tmp_path):
+    calendar = tmp_path / 'cal'
+    calendar.mkdir()
+    path = calendar / 'work.ics'
+    index = CalendarIndex(tmp_path / 'index.db')
+
+    write(path, vevent('a', 'Fix bug', 1), vevent('b', 'Second', 2), mtime=1000)
+    index.refresh(calendar)
+    # Two bytes longer, so the old offset lands inside the last event's END line
+    write(path, vevent('a', 'Fix bugs!', 1), vevent('b', 'Second', 2), mtime=2000)
+    stats = index.refresh(calendar)
+    assert (stats['resumed'], stats['parsed']) == (0, 1)
+    assert titles(index) == ['Fix bugs!', 'Second']
+
+def test_insert_above_offset_reparses(tmp_path):
+    calendar = tmp_path / 'cal'
+    calendar.mkdir()
+    path = calendar / 'work.ics'
+    index = CalendarIndex(tmp_path / 'index.db')
+
+    write(path, vevent('a', 'First', 1), vevent('b', 'Second', 2), mtime=1000)
+    index.refresh(calendar)
+    # A whole event inserted at the top shifts the old last event past the offset
+    write(path, vevent('z', 'Inserted', 3), vevent('a', 'First', 1), vevent('b', 'Second', 2), mtime=2000)
+    stats = index.refresh(calendar)
+    assert (stats['resumed'], stats['parsed']) == (0, 1)
+    assert titles(index) == ['First', 'Inserted', 'Second']
+
+    # And appending after that resumes again from the new offset
+    write(path, vevent('z', 'Inserted', 3), vevent('a', 'First', 1), vevent('b', 'Second', 2),
+          vevent('c', 'Third', 4), mtime=3000)
+    assert index.refresh(calendar)['resumed'] == 1
+    assert titles(index) == ['First', 'Inserted', 'Second', 'Third']
+
+def series_end(rrule: str, **extra) -> datetime:
+    event = {'UID': 'series', 'SUMMARY': 'Standup', 'DTSTART': ['20250106T090000', None],
+             'DTEND': ['20250106T093000', None], 'RRULE': rrule, **extra}
+    return datetime.fromtimestamp(CalendarIndex.event_row('work.ics', event)[4])
+
+def test_bounded_series_end_with_their_last_occurrence():
+    # COUNT: the fifth weekday is Friday, so the series ends Friday 09:30
+    assert series_end('FREQ=DAILY;BYDAY=MO,TU,WE,TH,FR;COUNT=5') == datetime(2025, 1, 10, 9, 30)
+    # A later RDATE extends it
+    assert series_end('FREQ=DAILY;COUNT=5', RDATE=[['20250301T090000', None]]) == datetime(2025, 3, 1, 9, 30)
+    # A DATE UNTIL covers occurrences later that day
+    assert series_end('FREQ=WEEKLY;UNTIL=20250120') == datetime(2025, 1, 21, 0, 30)
+    assert series_end('FREQ=WEEKLY').timestamp() == CalendarIndex.OPEN_ENDED
+    # COUNT that can never be reached (February 30th) stays open-ended rather than scanning forever
+    assert series_end('FREQ=MONTHLY;BYMONTH=2;BYMONTHDAY=30;COUNT=2').timestamp() == CalendarIndex.OPEN_ENDED
+
+def test_finished_count_series_is_not_queried(tmp_path):
+    calendar = tmp_path / 'cal'
+    calendar.mkdir()
+    write(calendar / 'work.ics', vevent('a', 'Sprint', 1).replace('END:VEVENT', 'RRULE:FREQ=DAILY;COUNT=3\r\nEND:VEVENT'),
+          mtime=1000)
+    index = CalendarIndex(tmp_path / 'index.db')
+    index.refresh(calendar)
+    assert len(index.series_between(datetime(2025, 12, 3), datetime(2025, 12, 4))) == 1
+    assert index.series_between(datetime(2025, 12, 4), datetime(2026, 1, 1)) == []
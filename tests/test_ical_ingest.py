@@ -0,0 +1,95 @@
+"""Sharded ingestion (ical_intelligence.ingest) and what callers merge from it"""
+
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+
+from ical_intelligence.index import CalendarIndex
+from ical_intelligence.ingest import pool_context
+from ical_intelligence.usage import UsageAggregator
+
+def vevent(uid: str, day: int, hour: int) -> str:
+    return (f'BEGIN:VEVENT\r\nUID:{uid}\r\nSUMMARY:Session {uid}\r\n'
+            f'DTSTART:202512{day:02d}T{hour:02d}0000\r\nDTEND:202512{day:02d}T{hour + 1:02d}0000\r\nEND:VEVENT\r\n')
+
+def write_calendars(calendar, files: int = 5, events: int = 40):
+    calendar.mkdir()
+    for number in range(files):
+        body = ''.join(vevent(f'{number}-{i}', 1 + i % 28, 8 + i % 10) for i in range(events * (number + 1)))
+        (calendar / f'cal{number}.ics').write_text(f'BEGIN:VCALENDAR\r\n{body}END:VCALENDAR\r\n', newline='')
+
+def index_rows(index: CalendarIndex):
+    return index.db.execute('SELECT path, uid, series, start_ts, end_ts, recurrence_ts, data '
+                            'FROM events ORDER BY id').fetchall()
+
+def test_pool_is_not_forked_from_a_threaded_process(tmp_path):
+    calendar = tmp_path / 'cal'
+    write_calendars(calendar)
+    serial = CalendarIndex(tmp_path / 'serial.db')
+    serial.refresh(calendar, workers=1)
+
+    # As in `serve`: ingestion on an executor thread while the event loop thread lives on
+    release = threading.Event()
+    loop_thread = threading.Thread(target=release.wait)
+    loop_thread.start()
+    try:
+        context = pool_context()
+        assert context is not None and context.get_start_method() != 'fork'
+        pooled = CalendarIndex(tmp_path / 'pooled.db')
+        refresh = threading.Thread(target=pooled.refresh, args=(calendar, 2))
+        refresh.start()
+        refresh.join(60)
+        assert not refresh.is_alive()
+    finally:
+        release.set()
+        loop_thread.join()
+    assert index_rows(CalendarIndex(tmp_path / 'pooled.db')) == index_rows(serial)
+
+def test_pooled_index_refresh_matches_serial(tmp_path):
+    calendar = tmp_path / 'cal'
+    write_calendars(calendar)
+    serial, pooled = CalendarIndex(tmp_path / 'serial.db'), CalendarIndex(tmp_path / 'pooled.db')
+    assert serial.refresh(calendar, workers=1)['workers'] == 1
+    assert pooled.refresh(calendar, workers=2)['workers'] == 2
+    assert index_rows(pooled) == index_rows(serial)
+
+    # Incremental: one file resumed, one rewritten
+    with open(calendar / 'cal1.ics', 'a', newline='') as f:
+        f.write(vevent('late', 29, 9))
+    (calendar / 'cal3.ics').write_text(f'BEGIN:VCALENDAR\r\n{vevent("only", 30, 10)}END:VCALENDAR\r\n', newline='')
+    serial.refresh(calendar, workers=1)
+    pooled.refresh(calendar, workers=2)
+    assert index_rows(pooled) == index_rows(serial)
+
+def write_transcripts(projects, now: datetime, files: int = 6):
+    for number in range(files):
+        project = projects / f'-home-me-project-{number % 3}'
+        project.mkdir(parents=True, exist_ok=True)
+        with open(project / f'session-{number}.jsonl', 'a') as f:
+            for i in range(50 * (number + 1)):
+                f.write(json.dumps({
+                    'type': 'assistant',
+                    'timestamp': (now - timedelta(minutes=7 * i + number)).astimezone(timezone.utc).isoformat(),
+                    'message': {'model': f'claude-{("sonnet", "opus")[(i + number) % 2]}',
+                                'usage': {'input_tokens': 100 + i, 'output_tokens': number}}
+                }) + '\n')
+
+def test_pooled_usage_refresh_matches_serial(tmp_path):
+    now = datetime(2025, 12, 10, 15, 0)
+    projects = tmp_path / 'projects'
+    write_transcripts(projects, now)
+    serial = UsageAggregator(projects, tmp_path / 'serial.json')
+    pooled = UsageAggregator(projects, tmp_path / 'pooled.json')
+    assert serial.refresh(now=now, workers=1)['workers'] == 1
+    assert pooled.refresh(now=now, workers=2)['workers'] == 2
+    # Same buckets in the same order, so the checkpoints are byte for byte the same
+    assert (tmp_path / 'pooled.json').read_bytes() == (tmp_path / 'serial.json').read_bytes()
+    assert pooled.status(now=now) == serial.status(now=now)
+
+    # Tailing appended lines merges into the existing buckets the same way
+    later = now + timedelta(minutes=30)
+    write_transcripts(projects, later, files=4)
+    serial.refresh(now=later, workers=1)
+    pooled.refresh(now=later, workers=2)
+    assert (tmp_path / 'pooled.json').read_bytes() == (tmp_path / 'serial.json').read_bytes()
+    assert pooled.hourly_usage() == serial.hourly_usage()
@@ -0,0 +1,70 @@
+"""Single-pass #tag parsing against the original per-tag searches (ical_intelligence.metadata)"""
+
+import re
+import random
+
+from ical_intelligence.metadata import parse_session_text
+
+def reference_metadata(event_title: str, description: str = '') -> dict:
+    """The per-tag re.search version parse_session_text() replaced, plus #model and #priority"""
+    full_text = f"{event_title} {description}".lower()
+    metadata = {}
+
+    complexity_match = re.search(r'#complexity:(low|medium|high|critical)', full_text)
+    if complexity_match:
+        metadata['complexity'] = complexity_match.group(1)
+    elif any(word in full_text for word in ['simple', 'fix', 'tweak', 'update']):
+        metadata['complexity'] = 'low'
+    elif any(word in full_text for word in ['complex', 'architecture', 'design', 'critical']):
+        metadata['complexity'] = 'high'
+    else:
+        metadata['complexity'] = 'medium'
+
+    project_match = re.search(r'#project:(\S+)', full_text)
+    if project_match:
+        metadata['project'] = project_match.group(1)
+
+    token_match = re.search(r'#tokens:(\d+)([km]?)', full_text)
+    if token_match:
+        value = int(token_match.group(1))
+        metadata['explicit_tokens'] = value * {'k': 1000, 'm': 1000000}.get(token_match.group(2), 1)
+
+    agent_match = re.search(r'#agents:([a-z,]+)', full_text)
+    if agent_match:
+        metadata['suggested_agents'] = agent_match.group(1).split(',')
+
+    model_match = re.search(r'#model:(opus|sonnet|haiku)', full_text)
+    if model_match:
+        metadata['model'] = model_match.group(1)
+
+    priority_match = re.search(r'#priority:(\S+)', full_text)
+    if priority_match:
+        metadata['priority'] = priority_match.group(1)
+    return metadata
+
+# Fragments chosen to collide: tags with bad values, keywords inside tag
+# values and other words, repeated tags, case changes and glued punctuation
+FRAGMENTS = [
+    '#complexity:', '#project:', '#tokens:', '#agents:', '#model:', '#priority:', '#', ':', ',',
+    'low', 'medium', 'high', 'critical', 'bogus', 'Opus', 'sonnet', 'haiku', 'gpt',
+    '45k', '2m', '120', 'k', 'm', '7x', 'claude', 'droid', 'claude,droid',
+    'simple', 'fix', 'bugfix', 'prefix', 'tweak', 'update', 'complex', 'Complexity',
+    'architecture', 'design', 'redesign', 'review', 'meeting', 'p1', 'organized-ai', 'é', '\t', '\n'
+]
+
+def random_text(rng: random.Random) -> str:
+    words = rng.choices(FRAGMENTS, k=rng.randrange(0, 8))
+    return ''.join(word + rng.choice(['', ' ', ' ', '-']) for word in words)
+
+def test_matches_per_tag_reference_on_fuzzed_text():
+    rng = random.Random(5)
+    for _ in range(100000):
+        title, description = random_text(rng), random_text(rng)
+        assert parse_session_text(title, description) == reference_metadata(title, description), (title, description)
+
+def test_tag_values():
+    metadata = parse_session_text('Refactor #complexity:HIGH #tokens:2m', '#agents:claude,droid #model:opus #priority:p1')
+    assert metadata == {'complexity': 'high', 'explicit_tokens': 2000000, 'suggested_agents': ['claude', 'droid'],
+                        'model': 'opus', 'priority': 'p1'}
+    # A 'low' keyword wins over a 'high' one, including inside a tag value
+    assert parse_session_text('Architecture review', '#project:bugfix')['complexity'] == 'low'
@@ -0,0 +1,150 @@
+"""RRULE/RDATE/EXDATE expansion, time zones and moved instances (ical_intelligence.ics)"""
+
+import time
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from ical_intelligence import ics
+from ical_intelligence.ics import expand_recurrence, iter_rrule, parse_rrule
+
+WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+@pytest.fixture
+def utc(monkeypatch):
+    """Run with the machine's local zone set to UTC, so local times are predictable"""
+    monkeypatch.setenv('TZ', 'UTC')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+def rule_dates(rule: str, dtstart: datetime, start: datetime, end: datetime):
+    parsed = parse_rrule(rule)
+    until = datetime.strptime(parsed['until'], '%Y%m%dT%H%M%S') if parsed['until'] else None
+    return [moment for moment in iter_rrule(dtstart, parsed, until, start, end) if start <= moment < end]
+
+def series(dtstart: str, rrule: str = None, tzid: str = None, **extra):
+    event = {'UID': 'series', 'DTSTART': [dtstart, tzid]}
+    if rrule:
+        event['RRULE'] = rrule
+    event.update(extra)
+    return event
+
+def test_byday_ordinal_with_bymonthday():
+    # Third Monday: the Monday that falls on the 15th-21st
+    dates = rule_dates('FREQ=MONTHLY;BYDAY=3MO;BYMONTHDAY=15,16,17,18,19,20,21',
+                       datetime(2025, 1, 1, 9), datetime(2025, 1, 1), datetime(2025, 7, 1))
+    assert [moment.day for moment in dates] == [20, 17, 17, 21, 19, 16]
+    # The second Monday is never the 15th or the month's last day
+    assert rule_dates('FREQ=MONTHLY;BYDAY=2MO;BYMONTHDAY=-1,15',
+                      datetime(2025, 1, 13, 9), datetime(2025, 1, 1), datetime(2026, 1, 1)) == []
+
+def test_yearly_byday_ordinals_count_within_the_year():
+    dates = rule_dates('FREQ=YEARLY;BYDAY=20MO', datetime(2024, 1, 1, 9), datetime(2024, 1, 1), datetime(2027, 1, 1))
+    assert dates == [datetime(2024, 5, 13, 9), datetime(2025, 5, 19, 9), datetime(2026, 5, 18, 9)]
+
+def test_weekly_bysetpos_counts_from_dtstart():
+    # Mid-week start: only Tuesday remains in the first week, so BYSETPOS=1 picks it
+    dates = rule_dates('FREQ=WEEKLY;BYDAY=MO,TU;BYSETPOS=1;COUNT=3',
+                       datetime(2025, 3, 4, 9), datetime(2025, 3, 1), datetime(2025, 4, 1))
+    assert dates == [datetime(2025, 3, 4, 9), datetime(2025, 3, 10, 9), datetime(2025, 3, 17, 9)]
+
+def test_count_and_until_bound_the_series():
+    dtstart = datetime(2025, 1, 6, 9)
+    assert len(rule_dates('FREQ=DAILY;COUNT=5', dtstart, dtstart, dtstart + timedelta(days=30))) == 5
+    # COUNT is counted from DTSTART even when the window starts later
+    assert rule_dates('FREQ=DAILY;COUNT=5', dtstart, datetime(2025, 1, 9), datetime(2025, 2, 1)) == \
+        [datetime(2025, 1, 9, 9), datetime(2025, 1, 10, 9)]
+    # UNTIL is inclusive
+    assert rule_dates('FREQ=WEEKLY;UNTIL=20250120T090000', dtstart, dtstart, datetime(2025, 3, 1))[-1] == \
+        datetime(2025, 1, 20, 9)
+
+def test_open_ended_rule_skips_to_the_window(monkeypatch):
+    periods = []
+    original = ics._period_dates
+    monkeypatch.setattr(ics, '_period_dates', lambda *args: periods.append(args[1]) or original(*args))
+    dates = rule_dates('FREQ=DAILY;INTERVAL=3', datetime(2000, 1, 1, 9), datetime(2030, 6, 1), datetime(2030, 6, 10))
+    assert len(dates) == 3
+    assert len(periods) <= 5
+
+def test_exdate_and_rdate(utc):
+    event = series('20250106T090000', 'FREQ=DAILY;COUNT=5',
+                   EXDATE=[['20250107T090000', None], ['20250109', None]],
+                   RDATE=[['20250115T170000', None]])
+    assert list(expand_recurrence(event, datetime(2025, 1, 1), datetime(2025, 2, 1))) == [
+        datetime(2025, 1, 6, 9), datetime(2025, 1, 8, 9), datetime(2025, 1, 10, 9), datetime(2025, 1, 15, 17)
+    ]
+
+def test_series_keeps_wall_clock_time_across_dst(utc):
+    # 09:00 New York is 14:00 UTC before 2025-03-09 and 13:00 UTC after
+    event = series('20250303T090000', 'FREQ=WEEKLY;COUNT=3', tzid='America/New_York')
+    assert list(expand_recurrence(event, datetime(2025, 3, 1), datetime(2025, 4, 1))) == [
+        datetime(2025, 3, 3, 14), datetime(2025, 3, 10, 13), datetime(2025, 3, 17, 13)
+    ]
+
+def test_moved_instance_replaces_its_occurrence(utc, tmp_path, monkeypatch):
+    from ical_intelligence.bridge import iCalTokenBridge
+
+    calendar = tmp_path / 'cal'
+    calendar.mkdir()
+    (calendar / 'work.ics').write_text(
+        'BEGIN:VCALENDAR\r\n'
+        'BEGIN:VEVENT\r\nUID:standup\r\nSUMMARY:Standup\r\nDTSTART:20250106T090000\r\n'
+        'DTEND:20250106T100000\r\nRRULE:FREQ=DAILY;COUNT=3\r\nEND:VEVENT\r\n'
+        'BEGIN:VEVENT\r\nUID:standup\r\nRECURRENCE-ID:20250107T090000\r\nSUMMARY:Standup (moved)\r\n'
+        'DTSTART:20250107T150000\r\nDTEND:20250107T160000\r\nEND:VEVENT\r\n'
+        'END:VCALENDAR\r\n', newline=''
+    )
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('ICAL_CALENDAR_PATH', str(calendar))
+    sessions = iCalTokenBridge().get_calendar_sessions(datetime(2025, 1, 6), datetime(2025, 1, 9))
+    assert [(session['title'], session['start'].hour) for session in sessions] == [
+        ('Standup', 9), ('Standup (moved)', 15), ('Standup', 9)
+    ]
+
+def random_rule(rng: random.Random) -> str:
+    """
+    Random RRULE that always has future occurrences
+
+    dateutil searches to year 9999 for rules that can never match again, so
+    combinations that may be empty forever are left to the cases above.
+    """
+    freq = rng.choice(['DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY'])
+    parts = [f'FREQ={freq}']
+    if rng.random() < 0.4:
+        parts.append(f'INTERVAL={rng.randrange(1, 4)}')
+    monthday = freq != 'WEEKLY' and rng.random() < 0.4
+    if rng.random() < 0.5:
+        days = rng.sample(WEEKDAYS, rng.randrange(1, 4))
+        if freq in ('MONTHLY', 'YEARLY') and not monthday and rng.random() < 0.5:
+            days = [f'{rng.choice([1, 2, 3, -1, -2])}{day}' for day in days]
+        parts.append('BYDAY=' + ','.join(days))
+    if monthday:
+        parts.append('BYMONTHDAY=' + ','.join(str(rng.choice([1, 2, 10, 15, 28, -1, -2]))
+                                              for _ in range(rng.randrange(1, 3))))
+    if freq != 'WEEKLY' and rng.random() < 0.3:
+        parts.append('BYMONTH=' + ','.join(str(rng.randrange(1, 13)) for _ in range(rng.randrange(1, 3))))
+    if len(parts) > 1 and rng.random() < 0.2:
+        parts.append(f'BYSETPOS={rng.choice([1, -1])}')
+    if rng.random() < 0.3:
+        parts.append(f'WKST={rng.choice(WEEKDAYS)}')
+    bound = rng.random()
+    if bound < 0.4:
+        parts.append(f'COUNT={rng.randrange(1, 30)}')
+    elif bound < 0.7:
+        parts.append(f'UNTIL={datetime(2025, 1, 1) + timedelta(days=rng.randrange(900)):%Y%m%dT%H%M%S}')
+    return ';'.join(parts)
+
+def test_rules_match_dateutil():
+    rrule = pytest.importorskip('dateutil.rrule')
+    rng = random.Random(5)
+    for _ in range(400):
+        rule = random_rule(rng)
+        dtstart = datetime(2024, 1, 1, 9, 30) + timedelta(days=rng.randrange(400))
+        start = dtstart + timedelta(days=rng.randrange(-30, 400))
+        end = start + timedelta(days=rng.randrange(1, 200))
+        expected = [moment for moment in rrule.rrulestr(f'RRULE:{rule}', dtstart=dtstart).between(start, end, inc=True)
+                    if moment < end]
+        assert rule_dates(rule, dtstart, start, end) == expected, (rule, dtstart, start, end)
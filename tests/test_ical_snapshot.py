@@ -0,0 +1,45 @@
+"""The binary status snapshot against the JSON the live `status` path prints"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from ical_intelligence.snapshot import read_status_snapshot, write_status_snapshot
+from ical_intelligence.usage import UsageAggregator
+
+NOW = datetime(2025, 12, 10, 15, 0, 12, 345678)
+SIGNATURE = (3, 12000, 1765000000000000000, 0)
+
+def status(tmp_path, usage: dict) -> dict:
+    """UsageAggregator.status() over one transcript's {moment: (model, tokens)}"""
+    aggregator = UsageAggregator(tmp_path / 'projects', tmp_path / 'checkpoint.json')
+    state = {'days': {}, 'minutes': {}, 'hours': {}}
+    for moment, (model, tokens) in usage.items():
+        for key, bucket in ((moment.strftime('%Y-%m-%d'), 'days'), (str(int(moment.timestamp()) // 60), 'minutes')):
+            models = state[bucket].setdefault(key, {})
+            models[model] = models.get(model, 0) + tokens
+    aggregator.files = {'session.jsonl': state}
+    return aggregator.status(limit=200000, now=NOW)
+
+@pytest.mark.parametrize('usage', [
+    {},
+    {NOW - timedelta(days=1): ('claude-opus', 900)},
+    {NOW - timedelta(days=2): ('claude-opus', 50000), NOW - timedelta(hours=3): ('claude-sonnet', 1200),
+     NOW - timedelta(minutes=1): ('claude-"beta"-modèle', 7)},
+], ids=['empty', 'no-window', 'window'])
+def test_snapshot_renders_exactly_the_status_json(tmp_path, usage):
+    expected = status(tmp_path, usage)
+    path = str(tmp_path / 'ical-status.snapshot')
+    write_status_snapshot(path, expected, SIGNATURE, now=NOW.timestamp())
+    assert read_status_snapshot(path, SIGNATURE, now=NOW.timestamp()) == json.dumps(expected, indent=2) + '\n'
+
+def test_snapshot_is_ignored_once_stale(tmp_path):
+    usage = {NOW - timedelta(hours=3): ('claude-sonnet', 1200)}
+    path = str(tmp_path / 'ical-status.snapshot')
+    write_status_snapshot(path, status(tmp_path, usage), SIGNATURE, now=NOW.timestamp())
+
+    assert read_status_snapshot(path, SIGNATURE[:3] + (1,), now=NOW.timestamp()) is None  # quota-tracker.json changed
+    # The oldest tokens leave the five-hour window two hours from now
+    assert read_status_snapshot(path, SIGNATURE, now=(NOW + timedelta(hours=2)).timestamp()) is None
+    assert read_status_snapshot(str(tmp_path / 'missing'), SIGNATURE) is None
@@ -0,0 +1,123 @@
+"""UsageAggregator checkpoints: tailing, truncated or replaced transcripts and pruning"""
+
+import os
+import json
+from datetime import datetime, timedelta, timezone
+
+from ical_intelligence.usage import UsageAggregator
+
+NOW = datetime(2025, 12, 10, 15, 0)  # A Wednesday; the week starts Monday the 8th
+
+def line(moment: datetime, tokens: int, model: str = 'claude-sonnet') -> str:
+    return json.dumps({
+        'type': 'assistant',
+        'timestamp': moment.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z'),
+        'message': {'model': model, 'usage': {'input_tokens': tokens, 'output_tokens': 0}}
+    }) + '\n'
+
+def write(path, *lines: str, mtime: int):
+    path.write_text(''.join(lines))
+    os.utime(path, (mtime, mtime))
+
+def setup(tmp_path):
+    project = tmp_path / 'projects' / '-work-app'
+    project.mkdir(parents=True)
+    return project / 'session.jsonl', tmp_path / 'checkpoint.json'
+
+def aggregator(tmp_path) -> UsageAggregator:
+    return UsageAggregator(tmp_path / 'projects', tmp_path / 'checkpoint.json')
+
+def today_total(usage: UsageAggregator) -> int:
+    return usage.status(now=NOW)['daily']['total']
+
+def test_checkpoint_round_trip(tmp_path):
+    path, checkpoint = setup(tmp_path)
+    write(path, line(NOW - timedelta(hours=1), 100), line(NOW - timedelta(minutes=5), 20, 'claude-opus'), mtime=1000)
+    usage = aggregator(tmp_path)
+    assert usage.refresh(now=NOW)['tailed'] == 1
+    assert checkpoint.exists()
+
+    reloaded = aggregator(tmp_path)
+    assert reloaded.files == usage.files
+    assert reloaded.status(now=NOW) == usage.status(now=NOW)
+    stats = reloaded.refresh(now=NOW)
+    assert (stats['unchanged'], stats['tailed']) == (1, 0)
+    assert today_total(reloaded) == 120
+
+def test_partial_trailing_line_is_read_once_complete(tmp_path):
+    path, _ = setup(tmp_path)
+    first, second = line(NOW - timedelta(hours=1), 100), line(NOW - timedelta(minutes=5), 20)
+    write(path, first, second[:30], mtime=1000)
+    usage = aggregator(tmp_path)
+    usage.refresh(now=NOW)
+    assert usage.files[str(path)]['offset'] == len(first)
+    assert today_total(usage) == 100
+
+    write(path, first, second, mtime=2000)
+    stats = aggregator(tmp_path).refresh(now=NOW)
+    assert (stats['tailed'], stats['reset'], stats['bytes']) == (1, 0, len(second))
+    assert today_total(aggregator(tmp_path)) == 120
+
+def test_truncated_file_is_reread(tmp_path):
+    path, _ = setup(tmp_path)
+    write(path, line(NOW - timedelta(hours=2), 100), line(NOW - timedelta(hours=1), 50), mtime=1000)
+    aggregator(tmp_path).refresh(now=NOW)
+
+    write(path, line(NOW - timedelta(minutes=10), 7), mtime=2000)
+    usage = aggregator(tmp_path)
+    assert usage.refresh(now=NOW)['reset'] == 1
+    assert today_total(usage) == 7
+
+def test_rewritten_head_of_the_same_size_is_reread(tmp_path):
+    path, _ = setup(tmp_path)
+    write(path, line(NOW - timedelta(hours=2), 100), mtime=1000)
+    aggregator(tmp_path).refresh(now=NOW)
+
+    # Same inode and length, a different head: only the fingerprint tells
+    write(path, line(NOW - timedelta(hours=3), 300), mtime=2000)
+    usage = aggregator(tmp_path)
+    assert usage.refresh(now=NOW)['reset'] == 1
+    assert today_total(usage) == 300
+
+def test_replaced_file_is_reread(tmp_path):
+    path, _ = setup(tmp_path)
+    write(path, line(NOW - timedelta(hours=2), 100), mtime=1000)
+    aggregator(tmp_path).refresh(now=NOW)
+
+    # Rotated: a new inode, with the old content followed by more
+    replacement = path.with_name('session.jsonl.new')
+    write(replacement, line(NOW - timedelta(hours=2), 100), line(NOW - timedelta(hours=1), 40), mtime=2000)
+    os.replace(replacement, path)
+    usage = aggregator(tmp_path)
+    assert usage.refresh(now=NOW)['reset'] == 1
+    assert today_total(usage) == 140
+
+def test_removed_file_is_dropped(tmp_path):
+    path, _ = setup(tmp_path)
+    write(path, line(NOW - timedelta(hours=2), 100), mtime=1000)
+    aggregator(tmp_path).refresh(now=NOW)
+
+    path.unlink()
+    usage = aggregator(tmp_path)
+    assert usage.refresh(now=NOW)['removed'] == 1
+    assert usage.files == {} and aggregator(tmp_path).files == {}
+
+def test_buckets_outside_their_windows_are_pruned(tmp_path):
+    path, _ = setup(tmp_path)
+    moments = [NOW - timedelta(days=100), NOW - timedelta(days=5), NOW - timedelta(hours=6), NOW - timedelta(hours=1)]
+    write(path, *(line(moment, 10) for moment in moments), mtime=1000)
+    usage = aggregator(tmp_path)
+    usage.refresh(now=NOW)
+    state = usage.files[str(path)]
+
+    # Days from the week start, minutes for five hours, hours for the calibration history
+    assert sorted(state['days']) == ['2025-12-10']
+    assert [int(minute) for minute in state['minutes']] == [int(moments[3].timestamp()) // 60]
+    assert sorted(int(hour) for hour in state['hours']) == [int(moment.timestamp()) // 3600 for moment in moments[1:]]
+
+    # Nothing new to read, but a later refresh still drops what aged out, and saves that
+    later = NOW + timedelta(days=6)
+    assert usage.refresh(now=later)['unchanged'] == 1
+    state = aggregator(tmp_path).files[str(path)]
+    assert (state['days'], state['minutes']) == ({}, {})
+    assert len(state['hours']) == 3
@@ -0,0 +1,36 @@
+"""PollingWatcher: change detection without blocking the event loop"""
+
+import time
+import asyncio
+
+from ical_intelligence.watch import PollingWatcher
+
+def test_polling_stats_trees_off_the_event_loop(tmp_path, monkeypatch):
+    (tmp_path / 'work.ics').write_text('BEGIN:VCALENDAR\r\n')
+    walk = PollingWatcher.signature
+
+    def slow_signature(root):
+        time.sleep(0.3)  # A large projects tree
+        return walk(root)
+
+    monkeypatch.setattr(PollingWatcher, 'signature', staticmethod(slow_signature))
+    changes = []
+
+    async def watch():
+        watcher = PollingWatcher({'calendar': str(tmp_path)}, changes.append, interval=0.05)
+        watcher.start(asyncio.get_running_loop())
+        slowest, last = 0.0, time.perf_counter()
+        while not watcher.signatures:
+            await asyncio.sleep(0.01)
+            slowest, last = max(slowest, time.perf_counter() - last), time.perf_counter()
+
+        (tmp_path / 'work.ics').write_text('BEGIN:VCALENDAR\r\nEND:VCALENDAR\r\n')
+        deadline = time.perf_counter() + 5
+        while not changes and time.perf_counter() < deadline:
+            await asyncio.sleep(0.01)
+            slowest, last = max(slowest, time.perf_counter() - last), time.perf_counter()
+        watcher.close()
+        return slowest
+
+    assert asyncio.run(watch()) < 0.2
+    assert changes == ['calendar']
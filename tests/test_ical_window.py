@@ -0,0 +1,86 @@
+"""TokenWindow projections and earliest_start() next to planned calendar sessions"""
+
+import time
+
+from ical_intelligence.window import TokenWindow
+
+def fits(window, start, length, tokens, planned):
+    """Replay every window holding part of the session, straight from the definition"""
+    per_minute = {}
+    for first, minutes, amount, _ in [(start, length, tokens, 'planned')] + planned:
+        share, extra = divmod(amount, max(1, minutes))
+        for offset in range(max(1, minutes)):
+            if first + offset >= window.head:
+                per_minute[first + offset] = per_minute.get(first + offset, 0) + share + (offset < extra)
+    for end in range(start, start + max(1, length) + window.size - 1):
+        planned_tokens = sum(per_minute.get(minute, 0) for minute in range(end - window.size + 1, end + 1))
+        if window.used(end) + planned_tokens > window.limit:
+            return False
+    return True
+
+def brute_force_start(window, not_before, length, tokens, planned, horizon=1100):
+    for start in range(not_before, not_before + horizon):  # Past the last planned end plus a window
+        if fits(window, start, length, tokens, planned):
+            return start
+    return None
+
+def test_earliest_start_accounts_for_planned_sessions():
+    window = TokenWindow(limit=100000)
+    window.advance(1000)
+    window.add(990, 'sonnet', 40000)
+    calendar_session = (1060, 60, 30000, 'planned')
+
+    # Recorded usage alone would let it start now; the calendar session is what overflows
+    assert window.project([(1000, 120, 50000, 'planned')])['overflow_minute'] is None
+    assert window.project([(1000, 120, 50000, 'planned'), calendar_session])['overflow_minute'] is not None
+
+    earliest = window.earliest_start(1000, 120, 50000, planned=[calendar_session])
+    assert earliest > 1000
+    assert window.project([(earliest, 120, 50000, 'planned'), calendar_session])['overflow_minute'] is None
+    assert earliest == brute_force_start(window, 1000, 120, 50000, [calendar_session])
+
+def test_earliest_start_matches_brute_force():
+    import random
+    rng = random.Random(3)
+    for _ in range(40):
+        # A one-hour window keeps the brute force cheap; the search does not depend on the size
+        window = TokenWindow(limit=100000, minutes=60)
+        window.advance(1000)
+        for _ in range(5):
+            window.add(rng.randrange(941, 1001), 'sonnet', rng.randrange(1000, 20000))
+        planned = [(rng.randrange(980, 1120), rng.randrange(5, 40), rng.randrange(5000, 60000), 'planned')
+                   for _ in range(rng.randrange(4))]
+        length, tokens = rng.randrange(5, 50), rng.randrange(10000, 90000)
+        assert window.earliest_start(1000, length, tokens, planned=planned) == \
+            brute_force_start(window, 1000, length, tokens, planned, horizon=300)
+
+def test_earliest_start_none_when_session_exceeds_limit():
+    window = TokenWindow(limit=1000)
+    window.advance(0)
+    assert window.earliest_start(0, 60, 5000) is None
+
+def test_over_budget_session_elsewhere_only_blocks_nearby_starts():
+    window = TokenWindow(limit=200000)
+    window.advance(1000)
+    window.add(990, 'sonnet', 150000)
+    alone = window.earliest_start(1000, 120, 100000)
+    assert alone == brute_force_start(window, 1000, 120, 100000, [])
+
+    # Over the limit on its own, but 8 hours after the session would end
+    far_off = (1720, 120, 250000, 'planned')
+    assert window.project([far_off])['overflow_minute'] is not None
+    assert window.earliest_start(1000, 120, 100000, planned=[far_off]) == alone
+    # Close enough to share a window with it, the session has to wait until it is out of the way
+    near = (alone + 200, 120, 250000, 'planned')
+    assert window.earliest_start(1000, 120, 100000, planned=[near]) == \
+        brute_force_start(window, 1000, 120, 100000, [near], horizon=1500)
+
+def test_earliest_start_is_fast_with_a_full_day_of_sessions():
+    window = TokenWindow(limit=200000)
+    window.advance(0)
+    window.add(0, 'sonnet', 150000)
+    planned = [(hour * 60, 50, 60000, 'planned') for hour in range(1, 25)]
+    started = time.perf_counter()
+    earliest = window.earliest_start(0, 240, 190000, planned=planned)
+    assert time.perf_counter() - started < 1.0
+    assert earliest == brute_force_start(window, 0, 240, 190000, planned, horizon=1800)